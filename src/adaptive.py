@@ -0,0 +1,104 @@
+"""
+ file: adaptive.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: adaptive frequency grid for bode evaluation
+ brief:
+    - adaptive_grid starts from a coarse log spaced grid plus seed frequencies
+      (pole/zero frequencies, see seed_frequencies) and only refines where needed
+        - every interval is split at its log midpoint, the midpoint response is
+          compared to the straight line (in log w) through its end points
+        - intervals whose magnitude (dB) or phase (degrees) error exceeds the
+          tolerance for any combination are kept for the next pass
+        - stops when every interval is within tolerance, or at max_points, in
+          which case the worst intervals are refined first
+    - the response function is evaluated once per new point, for all combinations
+    - seed_frequencies turns poles/zeros into the frequencies a resonance shows up
+      at: |p|, the damped frequency |Im p| and its half-power edges |Im p| +- |Re p|,
+      so a high-Q peak can't fall between two grid points
+"""
+
+import numpy as np
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+
+def seed_frequencies(roots, w_min, w_max):
+    """positive frequencies (rad/s) inside [w_min, w_max] where roots matter"""
+    roots = np.asarray(roots).ravel()
+    roots = roots[np.isfinite(roots)]
+    damped = np.abs(roots.imag)
+    seeds = np.concatenate(
+        [np.abs(roots), damped, damped + np.abs(roots.real), damped - np.abs(roots.real)]
+    )
+    seeds = seeds[(seeds >= w_min) & (seeds <= w_max)]
+    return np.unique(seeds)
+
+
+def _interval_error(h_low, h_mid, h_high):
+    """worst (over combinations) magnitude and phase error of each midpoint
+    against the straight line through the interval end points
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mag_low, mag_mid, mag_high = (
+            20 * np.log10(np.abs(h)) for h in (h_low, h_mid, h_high)
+        )
+        mag_error = np.abs(mag_mid - (mag_low + mag_high) / 2)
+        # phase change across the interval, wrapped to (-180, 180]
+        change = np.angle(h_high / h_low, deg=True)
+        phase_error = np.abs(np.angle(h_mid / h_low, deg=True) - change / 2)
+    phase_error = np.minimum(phase_error, 360 - phase_error)
+    # exact zeros/poles on the axis give inf/nan, nothing to refine there
+    mag_error = np.nan_to_num(mag_error, nan=0.0, posinf=0.0)
+    phase_error = np.nan_to_num(phase_error, nan=0.0, posinf=0.0)
+    return np.max(mag_error, axis=0), np.max(phase_error, axis=0)
+
+
+def adaptive_grid(
+    response,
+    w_min,
+    w_max,
+    seeds=(),
+    tol_db=0.1,
+    tol_deg=1.0,
+    max_points=1000,
+    initial_points=32,
+):
+    """(w, h) with w refined until the response is within tolerance
+    response(w) must return a (combinations x len(w)) complex array
+    """
+    w = np.unique(
+        np.concatenate(
+            [np.logspace(np.log10(w_min), np.log10(w_max), initial_points), seeds]
+        )
+    )
+    h = response(w)
+    pending = np.ones(w.size - 1, dtype=bool)  # intervals that may need refining
+
+    while np.any(pending) and w.size < max_points:
+        low = np.flatnonzero(pending)
+        low = low[w[low + 1] / w[low] > 1 + 1e-9]  # too narrow to split further
+        if low.size == 0:
+            break
+        mid = np.sqrt(w[low] * w[low + 1])  # log midpoint
+        h_mid = response(mid)
+        mag_error, phase_error = _interval_error(h[:, low], h_mid, h[:, low + 1])
+        score = np.maximum(mag_error / tol_db, phase_error / tol_deg)
+
+        refine = np.flatnonzero(score > 1)
+        budget = max_points - w.size
+        if refine.size > budget:  # worst intervals first
+            refine = refine[np.argsort(score[refine])[::-1][:budget]]
+        if refine.size == 0:
+            break
+
+        # insert the refined midpoints, both halves of a refined interval are
+        # checked again on the next pass
+        w_new = np.concatenate([w, mid[refine]])
+        h_new = np.concatenate([h, h_mid[:, refine]], axis=1)
+        order = np.argsort(w_new)
+        split = np.zeros(w_new.size, dtype=bool)
+        split[w.size :] = True
+        w, h, split = w_new[order], h_new[:, order], split[order]
+        pending = split[1:] | split[:-1]
+
+    return w, h
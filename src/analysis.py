@@ -0,0 +1,99 @@
+"""
+ file: analysis.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: implements PoleZeroAnalysis
+ brief:
+    - true poles and zeros of every substituted transfer function, found from the
+      RationalFunction coefficients (rational.py) with one batched companion
+      matrix eigenvalue solve each for numerator and denominator
+        - no per-combination sympy roots calls, no reliance on symbol names
+        - poles/zeros are (combinations x degree) arrays, nan padded
+    - per combination
+        - stable - every pole strictly in the left half plane
+        - dominant_pole - the slowest decaying pole (smallest |Re p|)
+        - dominant_time_constant - 1/|Re p| of the dominant pole (inf on the axis)
+        - natural_frequency, damping - |p| and -Re p/|p| of the dominant pole
+    - frequency_range sizes the bode grid from the pole/zero frequencies
+    - time_span sizes the step response grid from the dominant time constants
+    - summary returns the per combination values as a structured array
+"""
+
+import numpy as np
+from rational import batched_roots
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+DECADES_MARGIN = 2  # decades shown either side of the pole/zero frequencies
+TIME_CONSTANTS = 10  # time constants shown in the step response
+
+SUMMARY_DTYPE = np.dtype(
+    [
+        ("stable", bool),
+        ("dominant_time_constant", float),
+        ("natural_frequency", float),
+        ("damping", float),
+        ("max_frequency", float),
+    ]
+)
+
+
+class PoleZeroAnalysis:
+    """batched pole/zero analysis of every combination of a RationalFunction"""
+
+    def __init__(self, rational, values):
+        """find every pole and zero, values has one row per combination"""
+        num, den = rational.coefficients(values)
+        self.poles = batched_roots(den)
+        self.zeros = batched_roots(num)
+
+        real = np.where(np.isnan(self.poles), -np.inf, self.poles.real)
+        self.stable = np.all(real < 0, axis=1)
+
+        # dominant (slowest decaying) pole, smallest |Re p|
+        decay = np.where(np.isnan(self.poles), np.inf, np.abs(self.poles.real))
+        rows = np.arange(self.poles.shape[0])
+        if self.poles.shape[1]:
+            self.dominant_pole = self.poles[rows, np.argmin(decay, axis=1)]
+        else:  # no poles at all (polynomial in s)
+            self.dominant_pole = np.full(rows.size, np.nan, dtype=complex)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.dominant_time_constant = 1 / np.abs(self.dominant_pole.real)
+            self.natural_frequency = np.abs(self.dominant_pole)
+            self.damping = -self.dominant_pole.real / self.natural_frequency
+        magnitudes = np.abs(np.concatenate([self.poles, self.zeros], axis=1))
+        self.max_frequency = np.max(
+            np.where(np.isnan(magnitudes), 0, magnitudes), axis=1, initial=0
+        )
+
+    def frequency_range(self):
+        """(w_min, w_max) in rad/s covering every nonzero pole/zero frequency, or
+        None when there are none
+        """
+        magnitudes = np.abs(np.concatenate([self.poles, self.zeros], axis=1))
+        magnitudes = magnitudes[np.isfinite(magnitudes) & (magnitudes > 0)]
+        if magnitudes.size == 0:
+            return None
+        margin = 10.0**DECADES_MARGIN
+        return np.min(magnitudes) / margin, np.max(magnitudes) * margin
+
+    def time_span(self):
+        """end time (s) long enough for the slowest stable combination to settle,
+        falls back to the slowest decay of any combination, or None
+        """
+        finite = np.isfinite(self.dominant_time_constant)
+        stable = finite & self.stable
+        if np.any(stable):
+            return TIME_CONSTANTS * np.max(self.dominant_time_constant[stable])
+        if np.any(finite):
+            return TIME_CONSTANTS * np.min(self.dominant_time_constant[finite])
+        frequencies = self.natural_frequency[self.natural_frequency > 0]
+        if frequencies.size:  # undamped, show a few periods instead
+            return TIME_CONSTANTS * 2 * np.pi / np.min(frequencies)
+        return None
+
+    def summary(self):
+        """per combination values as a structured array (SUMMARY_DTYPE)"""
+        summary = np.empty(self.stable.size, dtype=SUMMARY_DTYPE)
+        for name in SUMMARY_DTYPE.names:
+            summary[name] = getattr(self, name)
+        return summary
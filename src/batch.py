@@ -0,0 +1,237 @@
+"""
+ file: batch.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: headless batch command line mode
+ brief:
+    - reads transfer functions and limits from one or more json spec files and
+      processes every spec in one invocation, no editing of test.py needed
+    - spec file is a list of specs, or {"specs": [...]}, each spec being
+        {
+            "name": "lowpass",                  (optional, used for file names)
+            "function": "z1/(p1*s + 1)",        (parsed with sympy)
+            "s": "s",                           (optional, default "s")
+            "limits": {"p1": [1e-6, 1e-3, 0.1], "z1": 1},
+            "time_domain": "numeric",           (optional, "symbolic", "euler" or "none")
+            "sweep": {"strategy": "latin_hypercube", "samples": 1000, "seed": 1}
+                                                (optional, see sampling.py)
+        }
+        - lists are min/typ/max tuples, complex values are strings ("1e-4+1j")
+    - writes, per spec, to the output directory
+        - <name>.npz - w, magnitude, phase, time, response, frequency_metrics,
+          step_metrics, values, labels
+        - <name>.csv - one row of values and metrics per combination, frequency
+          and step response metrics from metrics.py (FREQUENCY_DTYPE and STEP_DTYPE
+          columns)
+        - <name>_store/ with --formats store, a ResultStore directory
+          (results_store.py), one .npy per column to be memory mapped by
+          ResultStore.open, responses in --store-dtype (float32 by default)
+        - <name>_magnitude.png, <name>_phase.png, <name>_time.png with --plots only,
+          rendered with the non-interactive Agg backend, --render collection or
+          envelope (rendering.py) for large sweeps, saved rasterized at --dpi
+        - <name>_stats.json with --stats only, stage timers and counters
+          (instrumentation.py)
+    - sympy/numpy/the processing modules are imported after the arguments are
+      parsed, matplotlib only when --plots is given
+    - a spec that fails is reported and skipped, the exit status is 1 if any failed
+ usage:
+    python3 batch.py specs.json [more_specs.json ...] -o results [--plots]
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+# pylint: disable=import-outside-toplevel
+
+
+def load_specs(paths):
+    """read every spec from the given json files"""
+    specs = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+        if isinstance(data, dict):
+            data = data.get("specs", [data])
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for position, spec in enumerate(data):
+            spec.setdefault("name", f"{stem}_{position}")
+            specs.append(spec)
+    return specs
+
+
+def parse_value(value):
+    """json number or string (complex allowed) to a python number"""
+    import sympy as sp
+
+    if isinstance(value, str):
+        number = complex(sp.sympify(value))
+        return number.real if number.imag == 0 else number
+    return value
+
+
+def parse_spec(spec):
+    """(s_domain_func, s_var, limits) in the form process.build_fs expects"""
+    import sympy as sp
+
+    s_var = sp.Symbol(spec.get("s", "s"))
+    s_domain_func = sp.sympify(spec["function"], locals={s_var.name: s_var})
+    limits = {}
+    for name, value in spec["limits"].items():
+        if isinstance(value, list):
+            limits[name] = tuple(parse_value(val) for val in value)
+        else:
+            limits[name] = parse_value(value)
+    return s_domain_func, s_var, limits
+
+
+def run_spec(spec, args):
+    """process one spec and write its outputs, returns the files written"""
+    import numpy as np
+    import process
+
+    s_domain_func, s_var, limits = parse_spec(spec)
+    sweep = dict(spec.get("sweep", {}))
+    if "strategy" in sweep:
+        sweep["sweep"] = sweep.pop("strategy")
+    fs = process.build_fs(
+        s_domain_func, s_var, limits, use_cache=not args.no_cache, **sweep
+    )
+    fs.process_bode()
+    w = fs.frequency_grid(args.points)
+    h, magnitude, phase = fs.evaluate_bode(w)
+    bode_metrics = fs.frequency_metrics(w, h)
+
+    mode = spec.get("time_domain", "numeric")
+    if mode != "none":
+        fs.process_time_domain(mode=mode)
+
+    name = spec["name"]
+    written = []
+    labels = [str(label) for label in fs.labels_all_s]
+    arrays = {
+        "w": w,
+        "magnitude": magnitude,
+        "phase": phase,
+        "values": fs.values_all_s,
+        "labels": np.array(labels),
+        "frequency_metrics": bode_metrics,
+    }
+    if fs.responses_all_t is not None:
+        arrays["time"] = fs.time
+        arrays["response"] = fs.responses_all_t
+        arrays["step_metrics"] = fs.step_metrics()
+
+    if "npz" in args.formats:
+        file = os.path.join(args.output, f"{name}.npz")
+        np.savez(file, **arrays)
+        written.append(file)
+
+    if "csv" in args.formats:
+        file = os.path.join(args.output, f"{name}.csv")
+        with open(file, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            header = ["index", "label"] + list(fs.pz)
+            header += list(bode_metrics.dtype.names)
+            metrics = None
+            if fs.responses_all_t is not None:
+                metrics = fs.step_metrics_t
+                if metrics is None:
+                    metrics = fs.step_metrics()
+                header += list(metrics.dtype.names)
+            writer.writerow(header)
+            for index, label in enumerate(labels):
+                row = [index, label] + [str(val) for val in fs.values_all_s[index]]
+                row += bode_metrics[index].tolist()
+                if metrics is not None:
+                    row += metrics[index].tolist()
+                writer.writerow(row)
+        written.append(file)
+
+    if "store" in args.formats:
+        directory = os.path.join(args.output, f"{name}_store")
+        fs.to_store(w, dtype=np.dtype(args.store_dtype), path=directory)
+        written.append(directory)
+
+    if args.plots:
+        import matplotlib
+
+        matplotlib.use("Agg")  # never open a window in batch mode
+        import matplotlib.pyplot as plt
+        from rendering import save_figure
+
+        figures = {}
+        figures["magnitude"], figures["phase"] = fs.plot_bode(
+            annotate_plot=args.annotate, w=w, render=args.render
+        )
+        if fs.responses_all_t is not None:
+            figures["time"] = fs.plot_time_domain(render=args.render)
+        for kind, figure in figures.items():
+            file = os.path.join(args.output, f"{name}_{kind}.png")
+            written.append(save_figure(figure, file, dpi=args.dpi))
+            plt.close(figure)
+
+    if args.stats:
+        file = os.path.join(args.output, f"{name}_stats.json")
+        fs.stats.to_json(file)
+        written.append(file)
+
+    return written
+
+
+def main(argv=None):
+    """batch command line entry point, returns the exit status"""
+    parser = argparse.ArgumentParser(
+        description="Batch s-domain transfer function evaluation"
+    )
+    parser.add_argument("specs", nargs="+", help="json spec file(s)")
+    parser.add_argument("-o", "--output", default="results", help="output directory")
+    parser.add_argument(
+        "--formats",
+        default="npz,csv",
+        help="comma separated output formats (npz, csv, store)",
+    )
+    parser.add_argument(
+        "--store-dtype",
+        default="float32",
+        choices=("float32", "float64"),
+        help="response dtype of the store format",
+    )
+    parser.add_argument("--plots", action="store_true", help="also write png plots")
+    parser.add_argument(
+        "--annotate", action="store_true", help="annotate poles/zeros on plots"
+    )
+    parser.add_argument("--points", type=int, default=1000, help="frequency points")
+    parser.add_argument(
+        "--render",
+        default="lines",
+        choices=("lines", "collection", "envelope"),
+        help="plot rendering mode",
+    )
+    parser.add_argument("--dpi", type=int, default=100, help="plot resolution")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="disable the on-disk cache"
+    )
+    parser.add_argument(
+        "--stats", action="store_true", help="write stage timers/counters as json"
+    )
+    args = parser.parse_args(argv)
+    args.formats = set(args.formats.split(","))
+
+    os.makedirs(args.output, exist_ok=True)
+    failed = 0
+    for spec in load_specs(args.specs):
+        try:
+            written = run_spec(spec, args)
+        except Exception as error:  # pylint: disable=broad-except
+            failed += 1
+            print(f"{spec.get('name')}: failed, {type(error).__name__}: {error}")
+            continue
+        print(f"{spec['name']}: wrote {', '.join(written)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
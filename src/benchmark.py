@@ -0,0 +1,298 @@
+"""
+ file: benchmark.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: benchmark suite for the sweep, bode and time domain stages
+ brief:
+    - cases are built from the test.py examples (first order low pass, third
+      order polynomial with complex limits, band-pass) plus synthetic systems,
+      z1/((p1*s + 1)(p2*s + 1)...), scaled over
+        - parameter count (order of the synthetic system)
+        - values per parameter (1, 2 or 3 limits, 3^N combinations at most)
+        - grid size (frequency and time points)
+    - after one untimed warm up run (imports, first use), every case times each
+      stage, best of --repeat runs, then runs once more under tracemalloc for
+      the peak memory of each stage
+        - process_bode, evaluate_bode, plot_bode, process_time_domain,
+          plot_time_domain (plots include drawing the canvas)
+    - results are written as json (--output), one record per case
+        {"case": ..., "combinations": ..., "points": ...,
+         "stages": {"process_bode": {"seconds": ..., "peak_bytes": ...}, ...}}
+    - --baseline compares against a stored result file, a stage that is slower
+      (or uses more memory) than the baseline by more than the tolerance is a
+      regression and the exit status is 1, differences below --min-seconds are
+      treated as noise
+    - --save-baseline writes the results to the baseline file instead
+    - every measured run starts cold, so process_bode includes compiling s_func
+        - compiled engines kept by the process (executor.py) are cleared first
+        - the on-disk cache is off unless --cache is given
+        - no result memo (incremental.py), plot_bode evaluates again rather than
+          reusing the evaluate_bode rows
+    - plots are rendered (--render mode) with the non-interactive Agg backend and
+      closed, prints and warnings of the stages themselves are suppressed
+ usage:
+    python3 benchmark.py [--quick] [-o results.json] [--baseline base.json]
+    python3 benchmark.py --save-baseline --baseline base.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+import tracemalloc
+import warnings
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+# pylint: disable=import-outside-toplevel
+
+STAGES = (
+    "process_bode",
+    "evaluate_bode",
+    "plot_bode",
+    "process_time_domain",
+    "plot_time_domain",
+)
+
+
+def example_systems():
+    """the test.py examples, name -> (s_func, s_var, limits)"""
+    from sympy import Symbol
+
+    s = Symbol("s")
+    p1, p2, p3, p4, z1 = (Symbol(name) for name in ("p1", "p2", "p3", "p4", "z1"))
+    return {
+        "lowpass": (
+            z1 / (s * p1 + 1),
+            s,
+            {"p1": (1 / 1e6, 1 / 1e3, 1 / 1e1), "z1": (1, 2, 3)},
+        ),
+        "cubic": (
+            1 / ((p1 * (s**3)) + (p2 * (s**2)) + (p3 * s) + p4),
+            s,
+            {
+                "p1": 1 / 10e3 + 1j,
+                "p2": (1 / 1e6, 1 / 1e3, 1 / 1e1),
+                "p3": (1 + 1j, 2, 3),
+                "p4": (1, 2, 3),
+            },
+        ),
+        "bandpass": (
+            z1 * ((p1 / p2) * s) / (s**2 + ((p1 * s) / p2) + p1**2),
+            s,
+            {"p1": (1e3,), "p2": 10, "z1": (1, 1000)},
+        ),
+    }
+
+
+def synthetic_system(order, values):
+    """z1 over a chain of order real poles, values limits per parameter"""
+    from sympy import Mul, Symbol
+
+    s = Symbol("s")
+    poles = [Symbol(f"p{index}") for index in range(1, order + 1)]
+    s_func = Symbol("z1") / Mul(*[pole * s + 1 for pole in poles])
+    limits = {}
+    for index, pole in enumerate(poles):
+        typ = 10.0 ** -(index % 4)  # spread the poles over a few decades
+        limits[pole.name] = (typ / 2, typ, typ * 2)[:values] if values > 1 else typ
+    limits["z1"] = (1, 2, 3)[:values] if values > 1 else 1
+    return s_func, s, limits
+
+
+def cases(quick=False):
+    """(name, s_func, s_var, limits, points) for every benchmark case"""
+    points = (1000,) if quick else (1000, 10000)
+    orders = (2, 4) if quick else (2, 4, 6)
+    for name, (s_func, s_var, limits) in example_systems().items():
+        yield name, s_func, s_var, limits, 1000
+    for order in orders:
+        for values in (2, 3):
+            for count in points:
+                s_func, s_var, limits = synthetic_system(order, values)
+                yield f"chain-n{order}-v{values}-g{count}", s_func, s_var, limits, count
+
+
+def stage_calls(fs, points, render="lines"):
+    """(stage, callable) for every stage of one ExpressionClass, in order"""
+    import matplotlib.pyplot as plt
+
+    def evaluate():
+        fs.evaluate_bode(fs.frequency_grid(points))
+
+    def plot(method, **options):
+        figures = method(**options)
+        for figure in figures if isinstance(figures, tuple) else (figures,):
+            figure.canvas.draw()  # Agg only rasterizes on draw/save
+            plt.close(figure)
+
+    return [
+        ("process_bode", fs.process_bode),
+        ("evaluate_bode", evaluate),
+        ("plot_bode", lambda: plot(fs.plot_bode, points=points, render=render)),
+        ("process_time_domain", lambda: fs.process_time_domain(points=points)),
+        ("plot_time_domain", lambda: plot(fs.plot_time_domain, render=render)),
+    ]
+
+
+def measure(s_func, s_var, limits, points, use_cache, repeat, render="lines"):
+    """{stage: {"seconds", "peak_bytes"}} and the number of combinations"""
+    import process
+    from executor import clear_engines
+
+    # keep the stages' own prints/warnings out of the benchmark report
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return _measure(
+            process,
+            clear_engines,
+            s_func,
+            s_var,
+            limits,
+            points,
+            use_cache,
+            repeat,
+            render,
+        )
+
+
+def _measure(
+    process, clear_engines, s_func, s_var, limits, points, use_cache, repeat, render
+):
+    """measure, with output already silenced"""
+    stages = {stage: {"seconds": float("inf")} for stage in STAGES}
+    for _ in range(repeat):  # wall time, best of repeat, no tracemalloc overhead
+        clear_engines()
+        fs = process.build_fs(s_func, s_var, limits, use_cache=use_cache, memo=None)
+        for stage, call in stage_calls(fs, points, render):
+            start = time.perf_counter()
+            call()
+            elapsed = time.perf_counter() - start
+            stages[stage]["seconds"] = min(stages[stage]["seconds"], elapsed)
+
+    clear_engines()
+    fs = process.build_fs(s_func, s_var, limits, use_cache=use_cache, memo=None)
+    tracemalloc.start()
+    for stage, call in stage_calls(fs, points, render):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        call()
+        stages[stage]["peak_bytes"] = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return stages, len(fs.values_all_s)
+
+
+def compare(results, baseline, tolerance, memory_tolerance, min_seconds):
+    """regression messages of results against baseline (matched by case name)"""
+    previous = {record["case"]: record for record in baseline}
+    regressions = []
+    for record in results:
+        if record["case"] not in previous:
+            continue
+        for stage, now in record["stages"].items():
+            before = previous[record["case"]]["stages"].get(stage)
+            if before is None:
+                continue
+            seconds = now["seconds"] - before["seconds"]
+            if (
+                seconds > min_seconds
+                and now["seconds"] > before["seconds"] * (1 + tolerance)
+            ):
+                regressions.append(
+                    f"{record['case']} {stage}: {now['seconds']:.4f} s "
+                    f"(baseline {before['seconds']:.4f} s)"
+                )
+            slack = before["peak_bytes"] * memory_tolerance + 2**20  # 1 MB floor
+            if now["peak_bytes"] > before["peak_bytes"] + slack:
+                regressions.append(
+                    f"{record['case']} {stage}: {now['peak_bytes']} bytes peak "
+                    f"(baseline {before['peak_bytes']} bytes)"
+                )
+    return regressions
+
+
+def main(argv=None):
+    """benchmark command line entry point, returns the exit status"""
+    parser = argparse.ArgumentParser(description="Benchmark the processing stages")
+    parser.add_argument("-o", "--output", help="json file to write the results to")
+    parser.add_argument("--baseline", help="json baseline to compare against")
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="write results to --baseline"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.5, help="allowed slowdown (0.5 = 50%%)"
+    )
+    parser.add_argument(
+        "--memory-tolerance", type=float, default=0.25, help="allowed memory growth"
+    )
+    parser.add_argument(
+        "--min-seconds", type=float, default=0.05, help="slowdowns ignored below this"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case")
+    parser.add_argument("--quick", action="store_true", help="smaller case matrix")
+    parser.add_argument("--case", action="append", help="only run these case(s)")
+    parser.add_argument("--cache", action="store_true", help="use the on-disk cache")
+    parser.add_argument(
+        "--render",
+        default="lines",
+        choices=("lines", "collection", "envelope"),
+        help="plot rendering mode (rendering.py)",
+    )
+    args = parser.parse_args(argv)
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline needs --baseline")
+
+    import matplotlib
+
+    matplotlib.use("Agg")  # never open a window while benchmarking
+
+    # one untimed run so imports and first use don't land on the first case
+    _, s_func, s_var, limits, points = next(cases(args.quick))
+    measure(s_func, s_var, limits, points, args.cache, 1)
+
+    results = []
+    for name, s_func, s_var, limits, points in cases(args.quick):
+        if args.case and name not in args.case:
+            continue
+        stages, combinations = measure(
+            s_func, s_var, limits, points, args.cache, args.repeat, args.render
+        )
+        results.append(
+            {
+                "case": name,
+                "combinations": combinations,
+                "points": points,
+                "stages": stages,
+            }
+        )
+        timings = ", ".join(
+            f"{stage} {values['seconds']:.4f} s" for stage, values in stages.items()
+        )
+        print(f"{name} ({combinations} combinations): {timings}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        regressions = compare(
+            results, baseline, args.tolerance, args.memory_tolerance, args.min_seconds
+        )
+        for regression in regressions:
+            print(f"regression: {regression}")
+        if regressions:
+            return 1
+        print("no regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
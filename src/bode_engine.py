@@ -0,0 +1,88 @@
+"""
+ file: bode_engine.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: implements BodeEngine
+ brief:
+    - ratios of polynomials in s use the RationalFunction backend (rational.py)
+        - coefficients are compiled once, evaluation is a batched Horner scheme
+    - anything else lambdifies s_func exactly once, taking s and every pole/zero
+      symbol as arguments
+    - generated evaluators can be cached on disk by passing a DiskCache (cache.py)
+    - evaluates the full (combination x frequency) grid in one broadcast numpy call
+        - values is a 2-D array, one row per combination, one column per pole/zero
+          (same ordering as ExpressionClass.pz)
+        - w is a 1-D array of frequencies in rad/s
+    - returns complex response, magnitude (dB) and phase (degrees) arrays,
+      each shaped (combinations, frequencies)
+"""
+
+import sympy as sp
+import numpy as np
+from cache import evaluator_source, load_evaluator
+from rational import RationalFunction
+from instrumentation import count
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+
+class BodeEngine:
+    """compiled frequency response evaluator for a symbolic s-domain function"""
+
+    def __init__(self, s_func, s_var, pz, cache=None):
+        """compile s_func once, as polynomial coefficients when possible
+        generated code is stored in / loaded from cache (cache.py) when given
+        """
+        self.s_var = s_var
+        self.pz = list(pz)
+        self.symbols = [sp.Symbol(name) for name in self.pz]
+        self.rational = None
+        self.h_lambda = None
+        try:
+            self.rational = RationalFunction(s_func, s_var, self.pz, cache=cache)
+            return
+        except ValueError:  # not a ratio of polynomials in s
+            pass
+
+        # s first, then poles/zeros in order
+        args = [s_var] + self.symbols
+        key, entry = None, None
+        if cache is not None:
+            key = cache.key("bode", s_func, *args)
+            entry = cache.get(key)
+        if entry is None:
+            entry = {"h": evaluator_source(sp.lambdify(args, s_func, "numpy"))}
+            count("lambdify")
+            if cache is not None:
+                cache.put(key, entry)
+        self.h_lambda = load_evaluator(entry["h"])
+
+    def response(self, values, w):
+        """complex response H(jw) for every combination (rows) and frequency (columns)"""
+        return self.transfer(values, 1j * np.asarray(w, dtype=float))
+
+    def transfer(self, values, s):
+        """H(s) for every combination (rows) and complex point s (columns)"""
+        values = np.atleast_2d(np.asarray(values))
+        s = np.asarray(s, dtype=complex)
+        if self.rational is not None:
+            return self.rational.transfer(values, s)
+        params = [values[:, index][:, np.newaxis] for index in range(len(self.pz))]
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            h = self.h_lambda(s[np.newaxis, :], *params)  # points across columns
+        # constant or parameter-only expressions don't broadcast on their own
+        return np.broadcast_to(
+            np.asarray(h, dtype=complex), (values.shape[0], s.size)
+        ).copy()
+
+    def evaluate(self, values, w):
+        """return (response, magnitude in dB, phase in degrees)"""
+        h = self.response(values, w)
+        return (h,) + magnitude_phase(h)
+
+
+def magnitude_phase(h):
+    """magnitude in dB and phase in degrees of a complex response array"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        magnitude = 20 * np.log10(np.abs(h))
+    phase = np.angle(h, deg=True)
+    return magnitude, phase
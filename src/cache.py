@@ -0,0 +1,129 @@
+"""
+ file: cache.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: implements DiskCache and helpers for caching generated evaluators
+ brief:
+    - persistent, content-addressed cache for symbolic work that repeats across runs
+        - inverse laplace results (stored as srepr)
+        - generated evaluator source code (lambdify output)
+    - keys are a sha256 of the srepr of s_func plus the symbols used, the kind of
+      entry, and the sympy version (generated code may change between versions)
+    - entries are small json files in the cache directory
+        - POLE_ZERO_CACHE_DIR environment variable, else ~/.cache/pole_zero_processor
+    - size-bounded LRU eviction: reads refresh an entry's modification time, and
+      the least recently used entries are deleted once max_bytes is exceeded
+    - invalidate removes one entry (by key) or every entry
+    - evaluator_source / load_evaluator convert lambdify functions to and from source
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import sympy as sp
+from instrumentation import count
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+CACHE_VERSION = 1  # bump when the layout of cached entries changes
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def evaluator_source(func):
+    """source code of a function generated by sp.lambdify"""
+    return inspect.getsource(func)
+
+
+_numpy_namespace = None  # the namespace lambdify generates numpy code against
+
+
+def load_evaluator(source):
+    """rebuild a lambdify generated function from its source
+    the source is executed in the same numpy namespace lambdify uses
+    """
+    global _numpy_namespace  # pylint: disable=global-statement
+    if _numpy_namespace is None:
+        _numpy_namespace = sp.lambdify([], 0, "numpy").__globals__
+    namespace = dict(_numpy_namespace)
+    exec(source, namespace)  # pylint: disable=exec-used
+    return namespace["_lambdifygenerated"]
+
+
+class DiskCache:
+    """content-addressed on-disk cache with LRU eviction"""
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        """create the cache directory if needed"""
+        if path is None:
+            path = os.environ.get(
+                "POLE_ZERO_CACHE_DIR",
+                os.path.join(os.path.expanduser("~"), ".cache", "pole_zero_processor"),
+            )
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(self.path, exist_ok=True)
+
+    def key(self, kind, s_func, *symbols):
+        """content address for an entry of a given kind"""
+        parts = [str(CACHE_VERSION), sp.__version__, kind, sp.srepr(s_func)]
+        parts.extend(sp.srepr(symbol) for symbol in symbols)
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def _file(self, key):
+        """path of the json file for a key"""
+        return os.path.join(self.path, f"{key}.json")
+
+    def get(self, key):
+        """return the stored dict, or None on a miss"""
+        file = self._file(key)
+        try:
+            with open(file, "r", encoding="utf-8") as handle:
+                entry = json.load(handle)
+            os.utime(file)  # mark as recently used
+        except (OSError, ValueError):  # missing, evicted, or partially written
+            count("cache_misses")
+            return None
+        count("cache_hits")
+        return entry
+
+    def put(self, key, entry):
+        """store a json serializable dict, then evict down to max_bytes"""
+        handle, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(handle, "w", encoding="utf-8") as file:
+            json.dump(entry, file)
+        os.replace(tmp, self._file(key))  # atomic, readers never see half an entry
+        self.evict()
+
+    def evict(self):
+        """delete least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.path):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.path, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
+            total -= size
+
+    def invalidate(self, key=None):
+        """remove one entry, or every entry when no key is given"""
+        if key is not None:
+            names = [f"{key}.json"]
+        else:
+            names = [name for name in os.listdir(self.path) if name.endswith(".json")]
+        for name in names:
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
@@ -0,0 +1,274 @@
+"""
+ file: executor.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: implements SweepExecutor and the sweep tasks it runs
+ brief:
+    - splits the combination space (rows of ExpressionClass.values_all_s) into chunks
+      and runs them serially, on a thread pool, or on a process pool
+        - kind "serial", "thread" or "process", workers (default os.cpu_count()),
+          chunk_size combinations per task
+    - results are merged back in combination order, the same order as the labels
+    - failures are reported per combination instead of ending the whole process
+        - a chunk that raises is re-run one combination at a time in the worker,
+          so only the combinations that actually fail are reported
+        - timeout (seconds) is applied while waiting on each chunk, every
+          combination in a chunk that times out is reported
+        - failed combinations come back as nan rows, see Failure
+        - a process pool whose chunk timed out has its worker processes
+          terminated, a hung task never outlives map
+    - the thread/process pool is created on the first map and reused by later
+      calls (adaptive refinement passes, streamed chunks), close (or a with
+      block) shuts it down, a pool that timed out or broke is replaced
+    - counts made in worker processes (lambdify, cache hits/misses, ...) come back
+      with each chunk and are added to this process's counters (instrumentation.py)
+    - tasks are module level functions taking (spec, values, *args) so they can be
+      sent to worker processes
+        - spec is (s_func, s_var, pz, cache_path), engine_for compiles it once per
+          process and keeps it for later chunks, keyed on structure_key so
+          functions that differ only in symbol names share one engine, the
+          MAX_ENGINES most recently used are kept
+        - bode_task - complex frequency response, see bode_engine.py
+        - step_task - numeric unit-step response, see time_domain.py
+        - euler_task - numeric inversion of any s_func, see time_domain.py
+"""
+
+import collections
+import concurrent.futures
+import os
+import numpy as np
+import sympy as sp
+from bode_engine import BodeEngine
+from cache import DiskCache
+from instrumentation import count, counts
+from time_domain import step_response, euler_step
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+EXECUTOR_KINDS = ("serial", "thread", "process")
+
+# index - combination index (row of values), kind - "error" or "timeout"
+Failure = collections.namedtuple("Failure", ["index", "kind", "message"])
+
+MAX_ENGINES = 32  # compiled engines kept per process
+_engines = collections.OrderedDict()  # structure_key -> BodeEngine, LRU order
+
+
+def structure_key(s_func, s_var, pz):
+    """srepr of s_func with s and the poles/zeros renamed by position in pz,
+    equal for functions that differ only in the names of their symbols
+    """
+    mapping = {s_var: sp.Symbol("_s")}
+    mapping.update(
+        {sp.Symbol(name): sp.Symbol(f"_{index}") for index, name in enumerate(pz)}
+    )
+    return sp.srepr(s_func.xreplace(mapping))
+
+
+def engine_for(spec):
+    """compiled BodeEngine for a (s_func, s_var, pz, cache_path) spec"""
+    s_func, s_var, pz, cache_path = spec
+    key = structure_key(s_func, s_var, pz)  # values are passed by position
+    if key in _engines:
+        _engines.move_to_end(key)  # recently used
+        return _engines[key]
+    cache = DiskCache(cache_path) if cache_path is not None else None
+    _engines[key] = BodeEngine(s_func, s_var, pz, cache=cache)
+    while len(_engines) > MAX_ENGINES:
+        _engines.popitem(last=False)
+    return _engines[key]
+
+
+def clear_engines():
+    """forget every compiled engine of this process (benchmarks, cold runs)"""
+    _engines.clear()
+
+
+def bode_task(spec, values, w):
+    """complex response for a chunk of combinations"""
+    return engine_for(spec).response(values, w)
+
+
+def step_task(spec, values, time):
+    """numeric unit-step response for a chunk of combinations"""
+    rational = engine_for(spec).rational
+    if rational is None:
+        raise ValueError("s_func is not a ratio of polynomials")
+    num, den = rational.coefficients(values)
+    return step_response(num, den, time)
+
+
+def euler_task(spec, values, time):
+    """numerically inverted unit-step response for a chunk of combinations"""
+    engine = engine_for(spec)
+    return euler_step(lambda s: engine.transfer(values, s), time)
+
+
+def _run_chunk(task, spec, values, args):
+    """run a chunk, falling back to one combination at a time if it fails
+    returns (rows, [(row in chunk, kind, message), ...])
+    """
+    try:
+        return task(spec, values, *args), []
+    except Exception:  # pylint: disable=broad-except
+        pass
+    rows = []
+    errors = []
+    for row, combination in enumerate(values):
+        try:
+            rows.append(task(spec, combination[np.newaxis, :], *args)[0])
+        except Exception as error:  # pylint: disable=broad-except
+            rows.append(None)
+            errors.append((row, "error", f"{type(error).__name__}: {error}"))
+    return rows, errors
+
+
+def _run_chunk_counted(task, spec, values, args):
+    """_run_chunk in a worker process, returns (outcome, counts made meanwhile)
+    so the parent can add the worker's counts to its own
+    """
+    before = counts()
+    outcome = _run_chunk(task, spec, values, args)
+    return outcome, counts() - before
+
+
+class SweepExecutor:
+    """runs sweep tasks over chunks of combinations"""
+
+    def __init__(self, kind="serial", workers=None, chunk_size=256, timeout=None):
+        """kind is one of EXECUTOR_KINDS"""
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"executor kind must be one of {EXECUTOR_KINDS}")
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = max(1, int(chunk_size))
+        self.timeout = timeout
+        self._pool = None  # created by the first thread/process map
+        self._broken = False  # a worker died, the pool can't take more tasks
+
+    def __enter__(self):
+        """context manager, closes the pool on exit"""
+        return self
+
+    def __exit__(self, *exc_info):
+        """close the pool"""
+        self.close()
+
+    def close(self):
+        """shut down the pool, waiting for its workers, a later map starts a new one"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _get_pool(self):
+        """the reused thread/process pool, created on first use"""
+        if self._pool is None:
+            pool_class = (
+                concurrent.futures.ThreadPoolExecutor
+                if self.kind == "thread"
+                else concurrent.futures.ProcessPoolExecutor
+            )
+            self._pool = pool_class(max_workers=self.workers)
+            self._broken = False
+        return self._pool
+
+    def map(self, task, spec, values, *args):
+        """run task over every chunk of values (rows), merged in order
+        returns (results, failures), failed rows of results are nan
+        """
+        values = np.atleast_2d(np.asarray(values))
+        starts = range(0, len(values), self.chunk_size)
+        chunks = [values[start : start + self.chunk_size] for start in starts]
+
+        if self.kind == "serial":
+            outcomes = [_run_chunk(task, spec, chunk, args) for chunk in chunks]
+        else:
+            pool = self._get_pool()
+            # threads count into this process already, processes send counts back
+            run = _run_chunk if self.kind == "thread" else _run_chunk_counted
+            outcomes = []
+            finished = False
+            try:
+                futures = [pool.submit(run, task, spec, chunk, args) for chunk in chunks]
+                outcomes = [
+                    self._wait(future, len(chunk))
+                    for future, chunk in zip(futures, chunks)
+                ]
+                finished = True
+            finally:
+                timed_out = any(
+                    kind == "timeout" for _, errors in outcomes for _, kind, _ in errors
+                )
+                if timed_out or self._broken or not finished:
+                    # a hung or interrupted task must not keep its worker
+                    self._discard(pool, terminate=timed_out or not finished)
+
+        return self._merge(starts, outcomes, args[0] if args else ())
+
+    def _discard(self, pool, terminate):
+        """drop the pool without waiting on its tasks, killing its worker
+        processes when a task hung (terminate)
+        """
+        # shutdown forgets the workers, so take them first
+        workers = self._workers(pool) if self.kind == "process" else []
+        # don't wait on chunks that timed out, drop anything still queued
+        pool.shutdown(wait=False, cancel_futures=True)
+        if terminate:
+            self._terminate(workers)
+        self._pool = None
+
+    @staticmethod
+    def _workers(pool):
+        """worker processes of a process pool"""
+        return list((pool._processes or {}).values())  # pylint: disable=protected-access
+
+    @staticmethod
+    def _terminate(workers):
+        """kill worker processes, so a hung task neither keeps running nor
+        blocks the interpreter's exit
+        """
+        for process in workers:
+            if process.is_alive():
+                process.terminate()
+        for process in workers:
+            process.join()
+
+    def _wait(self, future, size):
+        """result of one chunk, or every combination in it reported as failed"""
+        try:
+            outcome = future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError:
+            errors = [(row, "timeout", "timeout") for row in range(size)]
+            return [None] * size, errors
+        except Exception as error:  # pylint: disable=broad-except
+            # worker process died, pickling failed, etc.
+            if isinstance(error, concurrent.futures.BrokenExecutor):
+                self._broken = True
+            message = f"{type(error).__name__}: {error}"
+            return [None] * size, [(row, "error", message) for row in range(size)]
+        if self.kind == "process":
+            outcome, worker_counts = outcome
+            for name, amount in worker_counts.items():
+                count(name, amount)
+        return outcome
+
+    def _merge(self, starts, outcomes, grid):
+        """stack chunk results in combination order, nan for failed combinations"""
+        failures = []
+        computed = []
+        for start, (result, errors) in zip(starts, outcomes):
+            failures.extend(
+                Failure(start + row, kind, message) for row, kind, message in errors
+            )
+            computed.extend(row for row in result if row is not None)
+        width = np.size(computed[0]) if computed else np.size(grid)
+        is_complex = any(np.iscomplexobj(row) for row in computed)
+        rows = sum(len(result) for result, _ in outcomes)
+        merged = np.full((rows, width), np.nan, dtype=complex if is_complex else float)
+        for start, (result, errors) in zip(starts, outcomes):
+            if not errors:  # whole chunk computed, copy it in one go
+                merged[start : start + len(result)] = result
+                continue
+            for row, values in enumerate(result):
+                if values is not None:
+                    merged[start + row] = values
+        return merged, failures
@@ -6,32 +6,95 @@
     - class containing fs information including parsed given information (poles/zeros, 
             limits, s symbol, and s_func)
         - class methods: 
-            - timeout_handler - is invoked after trying to perform inverse laplace 
-                for 20 seconds. If so exit program as it can't be done or is to 
-                computationally intense
+            - inverse_laplace - sympy's inverse laplace runs in worker processes
+                (symbolic.py) with a real timeout (20 seconds per strategy), direct then
+                partial fractions, a failure comes back as a result instead of exiting
             - process_bode - processes all FS substitutions based on indexing 
                 - utilizes itertools to calculate all dynamic looping needed
+                - sweep="corners"/"monte_carlo"/"latin_hypercube" (sampling.py) evaluate
+                  a seeded budget of samples instead of the full product
+                - substituted values are stored as a numpy array (values_all_s),
+                  sympy is not used per combination
+            - set_limits - edit the limits of some poles/zeros and re-process, rows
+                already evaluated for unchanged combinations are reused from the
+                memo (incremental.py) by the bode and time domain evaluations, the
+                frequency and time grids are kept (regrid=True sizes new ones) so
+                the rows stay comparable
             - plot_bode - calculates frequency range and plots bode. 
                 Pass in true for extra pole/zero annotations, false for not. 
                 Too many pole/zero will get too clutter hence the option
+                - adaptive=True refines the frequency grid near poles/zeros and where
+                  the curves bend (adaptive.py) instead of 1000 log spaced points
+                - s_func is compiled once by BodeEngine (bode_engine.py) and every
+                  combination/frequency is evaluated in a single broadcast call
+                - ratios of polynomials use RationalFunction (rational.py), batched
+                  polynomial coefficients evaluated with Horner's scheme
+                - render="collection"/"envelope" draws the whole sweep as one
+                  decimated LineCollection or a min/max band around typ
+                  (rendering.py), for sweeps too large for one line per combination
+            - frequency_metrics - -3 dB bandwidth, peak gain and frequency, gain and
+                phase margins with their crossovers, for every combination at once
+                (metrics.py), numbers to screen large sweeps without plots
+            - analyze - true poles/zeros of every combination (analysis.py), stability,
+                dominant time constants and natural frequencies, used to size the
+                frequency and time grids (falls back to the max 'p' limit heuristic)
             - process_time_domain - processes the inverse laplace given a unit step 
                 (in frequency domain - 1/s)
-            - settling calc - used to determine wether a function settles or not. Because
-                function may settle for some poles/zeros and not others, and they are on the 
-                same plot, the 5 unsettled spec is not used, and the settled versus unsettled 
-                nature of the specific response is noted in the legend 
+                - default numeric mode solves every combination at once in state-space
+                  form (time_domain.py), "symbolic" mode uses sympy's inverse laplace
+                  and falls back to numeric (or "euler" numeric inversion for functions
+                  that aren't ratios of polynomials) when sympy fails
+                - the inverse laplace result and generated evaluators are cached on
+                  disk when a DiskCache (cache.py) is passed to the class
+            - numeric bode/step evaluation is split into chunks of combinations and run
+                by the executor (executor.py, serial/thread/process), failed or timed
+                out combinations are kept in failures (nan rows) instead of exiting
+            - step_metrics - settling time, rise time, overshoot, steady state and settled
+                flag for every combination at once (metrics.py), a function may settle
+                for some poles/zeros and not others on the same plot, so the settled
+                versus unsettled nature of each response is noted in the legend
             - plot_time_domain - calculates time, settling, and plots time domain response 
+                - same render modes as plot_bode
             - display_all_plots - call to show all processed plots
+            - to_store - columnar ResultStore (results_store.py) of the sweep, int8
+                limit codes, values, float32/float64 responses and metrics, saved as
+                .npy columns that reopen memory mapped (codes_all_s holds the codes)
+            - matplotlib is only imported by the plotting methods (headless runs, batch.py)
+            - stats - per stage timers (plot_bode time includes evaluate_bode) and
+                counters (combinations, lambdify compilations, cache hits/misses,
+                evaluated points, inverse laplace calls), see instrumentation.py
+         - for sweeps too large to hold in memory, see iter_sweep/run_sweep in sweep.py
+         - for many functions in one run (shared grids, caches and compiled
+           evaluators, one batched evaluation per structure), see process_many in
+           multi_system.py
          - note that process_bode must be processed before process_time_domain due to general flow
  """
 
 import itertools
-import signal
 import sys
 from sympy import Symbol
 import sympy as sp
-import matplotlib.pyplot as plt
 import numpy as np
+from bode_engine import magnitude_phase
+from executor import (
+    SweepExecutor,
+    engine_for,
+    structure_key,
+    bode_task,
+    step_task,
+    euler_task,
+)
+from sampling import LIMIT_NAMES, SAMPLED, SWEEP_STRATEGIES, sample_combinations
+from adaptive import adaptive_grid, seed_frequencies
+from rational import batched_roots
+from analysis import PoleZeroAnalysis
+from metrics import frequency_metrics, step_metrics
+from cache import evaluator_source, load_evaluator
+from instrumentation import Stats, count, timed
+from symbolic import SymbolicPool
+from incremental import ResultMemo
+from rendering import RENDER_MODES, DEFAULT_MAX_POINTS, annotate_poles_zeros, draw
+from results_store import DEFAULT_DTYPE, ResultStore
 
 # pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
 # pylint: disable=locally-disabled, multiple-statements, fixme, pointless-string-statement
@@ -42,13 +105,52 @@ class ExpressionClass:
     See main.py, the README, and further comments in methods for specifics
     """
 
-    def __init__(self, pz, limits, type, s_var, s_func):
+    def __init__(
+        self,
+        pz,
+        limits,
+        type,
+        s_var,
+        s_func,
+        cache=None,
+        executor=None,
+        sweep="product",
+        samples=None,
+        seed=None,
+        distribution="triangular",
+        symbolic=None,
+        memo="auto",
+        order=None,
+    ):
         """class initialized variables"""
         self.pz = pz
         self.limits = limits
         self.type = type
         self.s_var = s_var
         self.s_func = s_func
+        self.cache = cache  # optional DiskCache (cache.py) for symbolic work
+        # serial / thread / process execution of the sweep (executor.py)
+        self.executor = executor if executor is not None else SweepExecutor()
+        self.failures = []  # per combination Failure records from the executor
+        # worker processes for sympy's inverse laplace (symbolic.py)
+        self.symbolic = symbolic if symbolic is not None else SymbolicPool()
+        self.symbolic_result = None  # SymbolicResult of the last inverse laplace
+        # rows already evaluated, reused after set_limits (incremental.py), "auto"
+        # creates one in process_bode, None turns reuse off
+        self.memo = memo
+        self.memo_key = None  # identifies s_func in the memo, set by compile
+        # positions of pz in the compiled engine and memo key, a name independent
+        # order (multi_system.py) lets renamed copies of s_func share both, labels
+        # and values_all_s stay in the order of pz
+        self.order = [pz.index(name) for name in (pz if order is None else order)]
+        self.stats = Stats()  # stage timers and counters (instrumentation.py)
+        # which combinations to evaluate (sampling.py), product is every combination
+        if sweep not in SWEEP_STRATEGIES:
+            raise ValueError(f"sweep must be one of {SWEEP_STRATEGIES}")
+        self.sweep = sweep
+        self.samples = samples  # sample budget for the other strategies
+        self.seed = seed
+        self.distribution = distribution
 
         """general processing variables"""
         self.max = 0  # max pole/zero
@@ -62,18 +164,23 @@ class ExpressionClass:
         self.fs_processed = False
         self.labels_all_s = []
         self.annotate_labels_all_s = []
-        self.fs_all_s = []
+        self.values_all_s = []  # substituted values per combination (rows)
+        self.codes_all_s = None  # int8 limit index per combination (results_store.py)
+        self.spec = None  # (s_func, s_var, pz in order, cache path) sent to the executor
+        self.analysis = None  # PoleZeroAnalysis (analysis.py) of every combination
+        self.bode_engine = None  # compiled once in process_bode
+        self.frequency_metrics_s = None  # structured array of bode metrics (metrics.py)
 
         """time domain processing, labeling, and substitution variables"""
         self.ts_processed = True
         self.labels_all_t = []
-        self.ts_all_t = []
-
-    def timeout_handler(self, signum, frame):
-        """callback handler for inability to process inverse laplace in 20 seconds"""
-        print(f"Sympy couldn't perform inverse laplace on transfer function")
-        sys.exit(1)
+        self.time = None  # time grid, determined in process_time_domain()
+        self.w = None  # frequency grid of the last evaluate_bode
+        self.keep_grids = False  # reuse w and time, set by set_limits
+        self.responses_all_t = None  # (combinations x time) step responses
+        self.step_metrics_t = None  # structured array of step metrics (metrics.py)
 
+    @timed("process_bode")
     def process_bode(self):
         """implement class method for processing bode"""
         num_dimensions = len(self.limits)
@@ -116,106 +223,345 @@ class ExpressionClass:
             values = [3, 3]
             iterating through the last poles/zeros the quickest as specified. 
         """
-        label = np.chararray(len(self.pz), itemsize=3)
-        full_label = []
-        mag_values = []
-        for combination in itertools.product(*self.indices):
-            values = [
-                self.limits[dimension][index]
-                for dimension, index in enumerate(combination)
-            ]
-            for index, val in enumerate(values): #update max pole
-                if self.pz[index][0] == "p":
-                    mag_values.append(abs(val))
-            if max(mag_values) > self.max:  # calculate maximum pole/zero magnitude
-                self.max = max(mag_values)
-            for index in range(
-                len(combination)
-            ):  # create label based on combination length
-                if self.type[index] == 1:  # and self.type[index] containing 1,2,3
-                    label[
-                        index
-                    ] = "typ"  # representation type for limits (typ, min-max, etc.)
-                elif self.type[index] == 2:
-                    label[index] = "min" if combination[index] == 0 else "max"
-                elif self.type[index] == 3:
-                    label[index] = (
-                        "min"
-                        if combination[index] == 0
-                        else "typ"
-                        if combination[index] == 1
-                        else "max"
-                    )
-
-            # create both legend labels 'p1 = typ, p2 = min' etc.
-            # and annotate labels 'p1 = 1, p2 = 1' etc.
-            label = label.astype(str)
-            full_label = [val for label_pair in zip(self.pz, label) for val in label_pair]  # type: ignore
-            annotate_label = [val for label_pair in zip(self.pz, values) for val in label_pair]  # type: ignore
+        # start over, process_bode runs again after set_limits
+        self.labels_all_s, self.annotate_labels_all_s, self.values_all_s = [], [], []
+        codes = []
+        for combination, values in self.iter_combinations():
+            values, full_label, annotate_label = self.combination_labels(
+                combination, values
+            )
 
             # append to list of lists for all substitutions
             self.labels_all_s.append(full_label)
             self.annotate_labels_all_s.append(annotate_label)
-
-            # make all necessary substitutions and append to list self.fs_all_s
-            substitutions_dict = {key: value for key, value in zip(self.pz, list(values))}  # type: ignore
-            fs = self.s_func.subs(substitutions_dict)
-            self.fs_all_s.append(fs)
-
+            # substitutions are made numerically by BodeEngine, no per-combination sympy
+            self.values_all_s.append(values)
+            codes.append(combination)
+
+        self.values_all_s = np.array(self.values_all_s)
+        if self.memo == "auto":
+            self.memo = ResultMemo()
+        self.codes_all_s = np.array(codes, dtype=np.int8).reshape(len(codes), len(self.pz))
+        count("combinations", len(self.values_all_s))
+        self.compile()
+        self.analyze()
         self.fs_processed = True
 
-    def plot_bode(self, annotate_plot=False):
-        """implement plot bode class method"""
+    @timed("compile")
+    def compile(self):
+        """compile s_func once for all combinations, workers compile the same spec"""
+        self.max = self.pole_max()
+        cache_path = self.cache.path if self.cache is not None else None
+        pz = [self.pz[index] for index in self.order]
+        self.spec = (self.s_func, self.s_var, pz, cache_path)
+        self.bode_engine = engine_for(self.spec)  # takes keyed values
+        # by structure, so renamed copies of s_func share rows (multi_system.py)
+        self.memo_key = (structure_key(self.s_func, self.s_var, pz),)
+
+    def keyed(self, values):
+        """values (rows, columns in pz order) in the order of the engine/memo key"""
+        return np.asarray(values)[:, self.order]
+
+    def unkeyed(self, values):
+        """inverse of keyed, back to pz order"""
+        return np.asarray(values)[:, np.argsort(self.order)]
+
+    def typ_index(self):
+        """row of the combination with every pole/zero at typ, None when there is
+        none (min/max only limits, sampled sweeps)
+        """
+        if 2 in self.type:
+            return None
+        typ = [limit[1] if size == 3 else limit[0] for limit, size in zip(self.limits, self.type)]
+        rows = np.flatnonzero(np.all(self.values_all_s == np.array(typ), axis=1))
+        return int(rows[0]) if rows.size else None
+
+    def memoized(self, kind, grid, compute, values=None):
+        """compute(values) -> (rows, failures) for every combination over grid,
+        rows evaluated before (same function, grid and values) are reused
+        values defaults to values_all_s, both are in pz order
+        """
+        values = self.values_all_s if values is None else values
+        if self.memo is None:
+            return compute(values)
+        return self.memo.evaluate(
+            (kind,) + self.memo_key,
+            grid,
+            self.keyed(values),
+            lambda keyed: compute(self.unkeyed(keyed)),
+        )
+
+    def sweep_task(self, kind, task, grid, values=None):
+        """run an executor task over every combination not evaluated before"""
+
+        def compute(values):
+            count("points", len(values) * np.size(grid))
+            return self.executor.map(task, self.spec, self.keyed(values), grid)
+
+        return self.memoized(kind, grid, compute, values)
+
+    def set_limits(self, regrid=False, **limits):
+        """edit the limits of some poles/zeros (min/typ/max tuple or a single typ
+        value, as passed to process_fs) and re-process the bode combinations
+        combinations with unchanged values are reused from the memo by later
+        evaluate_bode/process_time_domain calls on the same grid, so the default
+        frequency and time grids stay the ones evaluated before the edit
+        regrid - size new default grids from the edited limits instead
+        """
+        self.keep_grids = not regrid
+        for name, value in limits.items():
+            if name not in self.pz:
+                raise ValueError(f"{name} is not one of the poles/zeros {self.pz}")
+            value = value if isinstance(value, tuple) else (value,)
+            magnitudes = tuple(abs(val) for val in value)
+            if magnitudes != tuple(sorted(magnitudes)):
+                raise ValueError("tuple is not in ascending order")
+            index = self.pz.index(name)
+            self.limits[index] = value
+            self.type[index] = len(value)
+        self.process_bode()
+
+    def pole_max(self):
+        """maximum pole magnitude over every limit of symbols named p*
+        (every limit when there are none)
+        """
+        mag_values = [
+            abs(val)
+            for name, limit in zip(self.pz, self.limits)
+            if name[0] == "p"
+            for val in limit
+        ]
+        if not mag_values:
+            mag_values = [abs(val) for limit in self.limits for val in limit]
+        return max(mag_values)
+
+    @timed("analyze")
+    def analyze(self, values=None):
+        """true poles/zeros, stability and time constants of every combination
+        (analysis.py), values defaults to values_all_s. None if s_func isn't rational
+        """
+        rational = self.bode_engine.rational
+        if rational is None:
+            self.analysis = None
+        else:
+            values = self.values_all_s if values is None else values
+            self.analysis = PoleZeroAnalysis(rational, self.keyed(values))
+        return self.analysis
+
+    def frequency_grid(self, points=1000):
+        """frequency range (rad/s) needed for proper display
+        sized from the true pole/zero frequencies when analyzed, otherwise from
+        the maximum pole limit
+        """
+        if self.keep_grids and self.w is not None and self.w.size == points:
+            return self.w  # kept across set_limits
+        if self.analysis is not None and self.analysis.frequency_range() is not None:
+            w_min, w_max = self.analysis.frequency_range()
+            return np.logspace(np.log10(w_min), np.log10(w_max), points)
+        w_max = int(np.log10(self.max))
+        return np.logspace(0, abs(w_max) + 10, points)
+
+    def time_grid(self, points=1000):
+        """time range using the dominant time constants when analyzed, otherwise
+        the max pole/zero
+        """
+        if self.keep_grids and self.time is not None and self.time.size == points:
+            return self.time  # kept across set_limits
+        if self.analysis is not None and self.analysis.time_span() is not None:
+            return np.linspace(0, self.analysis.time_span(), points)
+        return np.linspace(0, self.max * 10, points)
+
+    def iter_combinations(self):
+        """yield (combination, values) in sweep order
+        product - combination indexes each limit, values is None (taken from limits)
+        other strategies (sampling.py) - SAMPLED marks values drawn from a distribution
+        """
+        if self.sweep == "product":
+            self.indices = [range(size) for size in self.type]
+            for combination in itertools.product(*self.indices):
+                yield combination, None
+            return
+        codes, values = sample_combinations(
+            self.limits,
+            self.type,
+            self.sweep,
+            budget=self.samples,
+            seed=self.seed,
+            distribution=self.distribution,
+        )
+        for combination, row in zip(codes, values):
+            yield tuple(combination), list(row)
+
+    def combination_count(self):
+        """number of combinations iter_combinations yields, without listing them"""
+        if self.sweep == "product":
+            return int(np.prod(self.type, dtype=object))
+        if self.sweep == "corners":
+            corners = int(np.prod([1 if size == 1 else 2 for size in self.type], dtype=object))
+            return corners if self.samples is None else min(corners, self.samples)
+        return self.samples
+
+    def combination_labels(self, combination, values=None):
+        """values, legend label and annotate label for one combination of indices
+        legend labels 'p1 = typ, p2 = min' etc. (as ['p1', 'typ', 'p2', 'min'])
+        annotate labels 'p1 = 1, p2 = 1' etc. (as ['p1', 1, 'p2', 1])
+        sampled values (SAMPLED index) are labelled 'smp'
+        """
+        if values is None:
+            values = [
+                self.limits[dimension][index]
+                for dimension, index in enumerate(combination)
+            ]
+        # representation type for limits (typ, min-max, etc.)
+        label = [
+            "smp" if index == SAMPLED else LIMIT_NAMES[self.type[dimension]][index]
+            for dimension, index in enumerate(combination)
+        ]
+        full_label = [val for label_pair in zip(self.pz, label) for val in label_pair]  # type: ignore
+        annotate_label = [val for label_pair in zip(self.pz, values) for val in label_pair]  # type: ignore
+        return values, full_label, annotate_label
+
+    @timed("evaluate_bode")
+    def evaluate_bode(self, w):
+        """(response, magnitude in dB, phase in degrees) for every combination"""
+        self.w = np.asarray(w, dtype=float)
+        h, failures = self.sweep_task("bode", bode_task, self.w)
+        self.report_failures(failures)
+        return (h,) + magnitude_phase(h)
+
+    @timed("adaptive_bode")
+    def adaptive_bode(
+        self, w_min=None, w_max=None, tol_db=0.1, tol_deg=1.0, max_points=1000
+    ):
+        """(w, response) on an adaptive grid seeded with every pole/zero frequency
+        the range defaults to the one frequency_grid covers
+        """
+        grid = self.frequency_grid(2)
+        w_min = grid[0] if w_min is None else w_min
+        w_max = grid[-1] if w_max is None else w_max
+
+        seeds = ()
+        rational = self.bode_engine.rational
+        if rational is not None:  # true poles/zeros of every combination
+            num, den = rational.coefficients(self.keyed(self.values_all_s))
+            roots = np.concatenate([batched_roots(num), batched_roots(den)], axis=1)
+            seeds = seed_frequencies(roots, w_min, w_max)
+
+        failures = {}
+
+        def response(w):
+            h, chunk_failures = self.sweep_task("bode", bode_task, w)
+            failures.update((failure.index, failure) for failure in chunk_failures)
+            return h
+
+        w, h = adaptive_grid(
+            response, w_min, w_max, seeds, tol_db, tol_deg, max_points=max_points
+        )
+        self.report_failures([failures[index] for index in sorted(failures)])
+        return w, h
+
+    def report_failures(self, failures):
+        """keep and print failed combinations instead of ending the process"""
+        for failure in failures:
+            label = self.annotate_labels_all_s[failure.index]
+            print(f"Combination {label} failed ({failure.kind}): {failure.message}")
+        self.failures.extend(failures)
+
+    @timed("frequency_metrics")
+    def frequency_metrics(self, w=None, h=None, adaptive=False, max_points=1000):
+        """bandwidth, peak gain/frequency and gain/phase margins of every
+        combination (metrics.py), as a structured array
+        w, h - an already evaluated response, evaluated on frequency_grid (or the
+            adaptive grid) when not given
+        """
+        if not self.fs_processed:
+            print("Error, bode not processed. Process first")
+            sys.exit(1)
+        if h is None:
+            if adaptive:
+                w, h = self.adaptive_bode(max_points=max_points)
+            else:
+                w = self.frequency_grid() if w is None else w
+                h = self.evaluate_bode(w)[0]
+        self.frequency_metrics_s = frequency_metrics(w, h)
+        return self.frequency_metrics_s
+
+    @timed("plot_bode")
+    def plot_bode(
+        self,
+        annotate_plot=False,
+        adaptive=False,
+        max_points=1000,
+        points=1000,
+        w=None,
+        render="lines",
+        decimate_points=DEFAULT_MAX_POINTS,
+    ):
+        """implement plot bode class method, returns (magnitude, phase) figures
+        points - frequencies of the (non adaptive) log spaced grid
+        w - explicit frequencies instead of the default grid
+        adaptive - refine the frequency grid only where needed (adaptive.py),
+            with at most max_points frequencies
+        render - "lines", "collection" or "envelope" (rendering.py), the last two
+            draw curves decimated to decimate_points points
+        """
         if not self.fs_processed:
             print("Error, bode not processed. Process first")
             sys.exit(1)
+        if render not in RENDER_MODES:
+            raise ValueError(f"render must be one of {RENDER_MODES}")
 
-        # range needed for proper display
-        w_max = int(np.log10(self.max))
-        w = np.logspace(0, abs(w_max) + 10, 1000)
+        import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
 
         # declare plot
         fig1, ax1 = plt.subplots(1, 1, figsize=(15, 8))
         fig2, ax2 = plt.subplots(1, 1, figsize=(15, 8))
 
-        for tf, label, annotate in zip(self.fs_all_s, self.labels_all_s, self.annotate_labels_all_s):  # type: ignore
-            h_lambda = sp.lambdify(
-                self.s_var, tf
-            )  # lambdify for quick processing of jw for s
-            # Evaluate the magnitude of the transfer function for each frequency
-            magnitude = [
-                20 * np.log10(abs(h_lambda(1j * wi))) for wi in w
-            ]  # Convert to dB
-            phase = [np.angle(h_lambda(1j * wi), deg=True) for wi in w]
-            # Plot the magnitude response
-            ax1.semilogx(w, magnitude, label=label)
-            ax2.semilogx(w, phase, label=label)
-
-            # annotations, can be turned on and off by user in argument in call to method
-            # best for lower number of poles/zeros and limits
-            if annotate_plot == True:
-                x_list = []
-                for index in range(0, len(annotate), 2):  # parse annotation label
-                    x_shift = 0  # used to shift if multiple values in same place
-                    str = f"{annotate[index]} = {annotate[index + 1]}"
-                    if annotate[index][0] == "p":  # if pole, x value is reciprocal
-                        x = 1 / annotate[index + 1]
-                    else:
-                        x = annotate[index + 1]
-                    if x in x_list:  # if pole/zero is repeated shift the arrow
-                        x_shift = 10
-                    x_list.append(x)
-                    y_coord = np.argmin(
-                        np.abs(w - x)
-                    )  # find index closes to frequency of pole/zero
-
-                    # annotate the plot with pole/zero using and arrow
-                    ax1.annotate(
-                        str,
-                        xy=(x, magnitude[y_coord]),
-                        xytext=(x + x_shift, magnitude[y_coord] - 20),
-                        arrowprops=dict(facecolor="black", shrink=0.05),
-                    )
+        # evaluate every combination/frequency, chunked across the executor
+        if adaptive:
+            w, h = self.adaptive_bode(max_points=max_points)
+            magnitude_all, phase_all = magnitude_phase(h)
+        else:
+            w = self.frequency_grid(points) if w is None else np.asarray(w)
+            _, magnitude_all, phase_all = self.evaluate_bode(w)
+
+        if render == "lines":  # one line and legend entry per combination
+            for magnitude, phase, label, annotate in zip(magnitude_all, phase_all, self.labels_all_s, self.annotate_labels_all_s):  # type: ignore
+                # Plot the magnitude response
+                ax1.semilogx(w, magnitude, label=str(label))
+                ax2.semilogx(w, phase, label=str(label))
+
+                # annotations, can be turned on and off by user in argument in call to method
+                # best for lower number of poles/zeros and limits
+                if annotate_plot == True:
+                    x_list = []
+                    for index in range(0, len(annotate), 2):  # parse annotation label
+                        x_shift = 0  # used to shift if multiple values in same place
+                        annotation = f"{annotate[index]} = {annotate[index + 1]}"
+                        if annotate[index][0] == "p":  # if pole, x value is reciprocal
+                            x = 1 / annotate[index + 1]
+                        else:
+                            x = annotate[index + 1]
+                        if x in x_list:  # if pole/zero is repeated shift the arrow
+                            x_shift = 10
+                        x_list.append(x)
+                        y_coord = np.argmin(
+                            np.abs(w - x)
+                        )  # find index closes to frequency of pole/zero
+
+                        # annotate the plot with pole/zero using and arrow
+                        ax1.annotate(
+                            annotation,
+                            xy=(x, magnitude[y_coord]),
+                            xytext=(x + x_shift, magnitude[y_coord] - 20),
+                            arrowprops=dict(facecolor="black", shrink=0.05),
+                        )
+        else:  # everything in one collection/envelope, cost ~independent of size
+            typ = self.typ_index()
+            draw(ax1, w, magnitude_all, render, typ=typ, max_points=decimate_points, log_x=True)
+            draw(ax2, w, phase_all, render, typ=typ, max_points=decimate_points, log_x=True)
+            if annotate_plot == True:  # one arrow per distinct pole/zero value
+                annotate_poles_zeros(ax1, w, magnitude_all, self.pz, self.values_all_s)
 
         ax1.set_xlabel("Frequency [rad/s]")
         ax1.set_ylabel("Magnitude [dB]")
@@ -230,91 +576,227 @@ class ExpressionClass:
         ax2.legend(loc="upper right")
 
         plt.tight_layout()
-
-    def process_time_domain(self):
-        """implement method for processing time domain"""
-
-        # setup timeout handler for inverse laplace timeout and set callback handler
-        signal.signal(signal.SIGALRM, self.timeout_handler)
-        timeout = 20  # 20 seconds
-        step = (
-            1 / self.s_var
-        )  # 1/s is unit step. apply in s-domain for normal evaluation
-
-        try:  # try to perform the inverse laplace transform in 20 seconds or less
-            signal.alarm(timeout)
-            self.t_func = sp.inverse_laplace_transform(
-                (self.s_func * step), self.s_var, self.t_var
-            )
-            signal.alarm(0)
-        except TimeoutError:  # if not signal cannot be processed
-            print("Timeout error")
-
-        # iterate through combinations (as described in process_bode)
-        # in order to perform time domain substitutions
-        for combination in itertools.product(*self.indices):
-            values = [
-                self.limits[dimension][index]
-                for dimension, index in enumerate(combination)
-            ]
-            substitutions_dict = {key: value for key, value in zip(self.pz, list(values))}  # type: ignore
-            full_label = [
-                val for label_pair in zip(self.pz, values) for val in label_pair
-            ]
-            ts_current = self.t_func.subs(
-                substitutions_dict
-            )  # perform for given values
-            self.ts_all_t.append(ts_current)  # append evaluated expression to list
-            self.labels_all_t.append(full_label)  # append label to full label list
-
+        return fig1, fig2
+
+    @timed("process_time_domain")
+    def process_time_domain(
+        self, mode="numeric", points=1000, time=None, symbolic_result=None
+    ):
+        """implement method for processing time domain
+        mode "numeric" - batched state-space step response (time_domain.py), used
+            whenever s_func is a ratio of polynomials in s
+        mode "symbolic" - sympy inverse laplace transform then substitutions, falls
+            back to the numeric modes when sympy fails or times out
+        mode "euler" - numeric inversion of any s_func (time_domain.py)
+        all fill self.responses_all_t, one row per combination over self.time
+        points - samples of the time grid
+        time - explicit uniformly spaced times instead (kept fixed across edits)
+        symbolic_result - see inverse_laplace
+        """
+        self.time = self.time_grid(points) if time is None else np.asarray(time)
+        self.step_metrics_t = None  # stale once the responses change
+        self.labels_all_t = [list(label) for label in self.annotate_labels_all_s]
+
+        if mode == "euler":
+            self.process_time_domain_euler()
+            self.ts_processed = True
+            return
+        if mode == "numeric":
+            try:
+                self.process_time_domain_numeric()
+                self.ts_processed = True
+                return
+            except ValueError as error:  # not rational, or improper
+                print(f"Numeric step response unavailable ({error}), using sympy")
+
+        self.process_time_domain_symbolic(result=symbolic_result)
         self.ts_processed = True
 
-    def settling_calc(self, magnitude):
-        """determine settling calc for a given magnitude - pass in the last 10-30%
-        of the magnitude for good settled response calculation
+    @timed("step_response")
+    def process_time_domain_numeric(self):
+        """step response of every combination at once from polynomial coefficients"""
+        rational = self.bode_engine.rational
+        if rational is None:
+            raise ValueError(f"{self.s_func} is not a ratio of polynomials")
+        if rational.num_degree > rational.den_degree:
+            raise ValueError("improper transfer function")
+        self.t_func = None
+        self.responses_all_t, failures = self.sweep_task("step", step_task, self.time)
+        self.report_failures(failures)
+
+    @timed("euler_inversion")
+    def process_time_domain_euler(self):
+        """step response of every combination by numeric inversion of s_func,
+        for functions the state-space solver can't take (delays, ...)
+        """
+        self.t_func = None
+        self.responses_all_t, failures = self.sweep_task("euler", euler_task, self.time)
+        self.report_failures(failures)
+
+    @timed("symbolic_time_domain")
+    def process_time_domain_symbolic(self, numeric_fallback=True, result=None):
+        """inverse laplace transform of s_func * 1/s, evaluated for every combination
+        the transform and its evaluator (t first, then poles/zeros) are cached
+        numeric_fallback - when sympy fails, use the state-space step response, or
+            euler inversion if s_func isn't rational, instead of nan responses
         """
-        mag_min = np.min(magnitude)
-        mag_max = np.max(magnitude)
-        # the percentage change between the max and min is less than
-        # 20% the response has settled, else, it has not
-        if (mag_max - mag_min) / mag_min < 0.20:
-            return True
+        symbols = [Symbol(name) for name in self.pz]
+        args = [self.t_var] + symbols
+        key, entry = None, None
+        if self.cache is not None:
+            key = self.cache.key("time", self.s_func, self.s_var, *args)
+            entry = self.cache.get(key)
+
+        if entry is None:
+            self.t_func = self.inverse_laplace(result).t_func
+            if self.t_func is None and numeric_fallback:
+                try:
+                    self.process_time_domain_numeric()
+                except ValueError:  # not rational, or improper
+                    self.process_time_domain_euler()
+                return
+            if self.t_func is None:  # nothing to evaluate, leave responses as nan
+                shape = (len(self.values_all_s), self.time.size)
+                self.responses_all_t = np.full(shape, np.nan)
+                return
+            entry = {
+                "t_func": sp.srepr(self.t_func),
+                "t": evaluator_source(sp.lambdify(args, self.t_func, "numpy")),
+            }
+            count("lambdify")
+            if self.cache is not None:
+                self.cache.put(key, entry)
         else:
-            return False
-
-    def plot_time_domain(self):
-        """class method for plotting time domain response when given a unit step function (in freq domain - 1/s)"""
+            self.t_func = sp.sympify(entry["t_func"])
+
+        # evaluate every combination (rows) over the whole time grid (columns)
+        t_lambda = load_evaluator(entry["t"])
+
+        def compute(values):
+            params = [values[:, index][:, np.newaxis] for index in range(len(self.pz))]
+            shape = (len(values), self.time.size)
+            count("points", shape[0] * shape[1])
+            with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+                responses = t_lambda(self.time[np.newaxis, :], *params)
+            return np.broadcast_to(responses, shape).copy(), []
+
+        self.responses_all_t, _ = self.memoized("symbolic", self.time, compute)
+
+    @timed("inverse_laplace")
+    def inverse_laplace(self, result=None):
+        """sympy inverse laplace of the unit step response, run by the SymbolicPool
+        in worker processes with a real timeout (20 seconds per strategy by
+        default), returns the SymbolicResult, its t_func is None on failure
+        result - a SymbolicResult already found for this function (in its symbols),
+            used instead of transforming again
+        """
+        if result is None:
+            step = (
+                1 / self.s_var
+            )  # 1/s is unit step. apply in s-domain for normal evaluation
+
+            count("inverse_laplace")
+            result = self.symbolic.transform(self.s_func * step, self.s_var, self.t_var)
+        if result.t_func is None:
+            print(f"Sympy couldn't perform inverse laplace on transfer function ({result.error})")
+        self.symbolic_result = result
+        return result
+
+    @timed("step_metrics")
+    def step_metrics(self, settling_band=0.02, rise_band=(0.1, 0.9), tail_fraction=0.1):
+        """settling time, rise time, overshoot, steady state and settled flag of
+        every combination (metrics.py), as a structured array
+        """
+        self.step_metrics_t = step_metrics(
+            self.time, self.responses_all_t, settling_band, rise_band, tail_fraction
+        )
+        return self.step_metrics_t
+
+    @timed("to_store")
+    def to_store(self, w=None, dtype=DEFAULT_DTYPE, path=None):
+        """columnar ResultStore (results_store.py) of the processed sweep, codes,
+        values, magnitude/phase and frequency metrics over w (frequency_grid by
+        default), plus the step responses and metrics once the time domain is
+        processed, responses in dtype, saved to the directory path when given
+        """
+        if not self.fs_processed:
+            print("Error, bode not processed. Process first")
+            sys.exit(1)
+        store = ResultStore(
+            self.pz,
+            self.type,
+            self.codes_all_s,
+            self.values_all_s,
+            self.limits,
+            str(self.s_func),
+        )
+        w = self.frequency_grid() if w is None else np.asarray(w)
+        h, magnitude, phase = self.evaluate_bode(w)
+        store.add_grid("w", w)
+        store.add("magnitude", magnitude, grid="w", dtype=dtype)
+        store.add("phase", phase, grid="w", dtype=dtype)
+        store.add("frequency_metrics", self.frequency_metrics(w, h))
+        if self.responses_all_t is not None:
+            store.add_grid("time", self.time)
+            store.add("response", np.real(self.responses_all_t), grid="time", dtype=dtype)
+            metrics = self.step_metrics_t
+            store.add("step_metrics", metrics if metrics is not None else self.step_metrics())
+        if path is not None:
+            store.save(path)
+        return store
+
+    @timed("plot_time_domain")
+    def plot_time_domain(self, render="lines", decimate_points=DEFAULT_MAX_POINTS):
+        """class method for plotting time domain response when given a unit step function (in freq domain - 1/s)
+        returns the figure
+        render - "lines", "collection" or "envelope", see plot_bode
+        """
         if not self.ts_processed:
             print("Error, time domain not processed. Process first")
             sys.exit(1)
+        if render not in RENDER_MODES:
+            raise ValueError(f"render must be one of {RENDER_MODES}")
 
-        time = np.linspace(0, self.max * 10, 1000)  # time range using max pole/zero
+        import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
 
         fig3, ax3 = plt.subplots(1, 1, figsize=(15, 8))  # pylint: disable=invalid-name
-        for ts_current, label in zip(self.ts_all_t, self.labels_all_t):
-            t_lambda = sp.lambdify(
-                self.t_var, ts_current
-            )  # lambdify for quick substitution of time for t
-            magnitude = [t_lambda(ti) for ti in time]
-            label.append("settled")
-            settled = self.settling_calc(
-                magnitude[-100:]
-            )  # pass in last 100 values of magnitude (10% as 100/1000 = 10%)
-            if settled:
-                label.append("True")
-            else:
-                print(f"Time domain function for {ts_current} does not settle")
-                label.append("False")
-            ax3.plot(time, magnitude, label=label)
+        if self.step_metrics_t is None:
+            self.step_metrics()
+        metrics = self.step_metrics_t
+        if render == "lines":
+            for magnitude, label, settled in zip(self.responses_all_t, self.labels_all_t, metrics["settled"]):
+                label.append("settled")
+                if settled:
+                    label.append("True")
+                else:
+                    print(f"Time domain function for {label[:-1]} does not settle")
+                    label.append("False")
+                ax3.plot(self.time, magnitude, label=str(label))
+        else:
+            unsettled = np.count_nonzero(~metrics["settled"])
+            if unsettled:
+                print(f"Time domain function does not settle for {unsettled} of {metrics.size} combinations")
+            draw(
+                ax3,
+                self.time,
+                self.responses_all_t,
+                render,
+                typ=self.typ_index(),
+                max_points=decimate_points,
+            )
 
         ax3.set_xlabel("Time(s)")
         ax3.set_ylabel("Magnitude")
-        ax3.set_title(f"Time-domain unit-step response for {self.t_func}")
+        title = self.t_func if self.t_func is not None else f"({self.s_func})/s"
+        ax3.set_title(f"Time-domain unit-step response for {title}")
         ax3.grid(True)
         ax3.legend(loc="upper right")
 
         plt.tight_layout()
+        return fig3
 
     def display_all_plots(self):
         """display all the plots processed"""
+        import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
+
         plt.show()
@@ -0,0 +1,90 @@
+"""
+ file: incremental.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: implements ResultMemo, incremental re-evaluation of sweeps
+ brief:
+    - every evaluated row (one combination over one grid) is kept, keyed on
+        - the kind of result ("bode", "step", ...) and the function it came from
+        - a fingerprint of the grid (frequencies or times)
+        - the combination's substituted values
+    - evaluate only computes the rows it hasn't seen, so after editing one limit
+      (ExpressionClass.set_limits) only the combinations using the new values
+      are recomputed, and repeated values within a sweep are computed once
+    - failed rows (Failure records, nan) are returned but never kept
+    - least recently used rows are dropped beyond max_bytes
+"""
+
+import collections
+import hashlib
+import numpy as np
+from instrumentation import count
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+DEFAULT_MAX_BYTES = 256 * 2**20  # 256 MB of kept rows
+
+
+def fingerprint(grid):
+    """hashable digest of a grid array"""
+    grid = np.ascontiguousarray(grid)
+    digest = hashlib.sha1(grid.tobytes()).hexdigest()
+    return (grid.shape, str(grid.dtype), digest)
+
+
+class ResultMemo:
+    """rows of earlier evaluations, keyed on (kind, grid, values)"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        """empty memo holding at most max_bytes of rows"""
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.rows = collections.OrderedDict()  # (kind, grid, values) -> row
+
+    def evaluate(self, kind, grid, values, compute):
+        """rows for every combination (rows of values), computing only the
+        missing ones with compute(values) -> (rows, failures), the same contract
+        as SweepExecutor.map, returns (rows, failures)
+        """
+        grid_key = fingerprint(grid)
+        keys = [(kind, grid_key, tuple(row)) for row in np.asarray(values).tolist()]
+        missing = {}  # first row of every unseen key
+        for index, key in enumerate(keys):
+            if key not in self.rows and key not in missing:
+                missing[key] = index
+        count("memo_hits", len(keys) - len(missing))
+        count("memo_misses", len(missing))
+
+        computed, failures = {}, []
+        if missing:
+            order = list(missing.values())
+            rows, new_failures = compute(values[order])
+            failed = {failure.index for failure in new_failures}
+            for position, index in enumerate(order):
+                computed[keys[index]] = rows[position]
+                if position not in failed:  # a copy, a view would pin the batch
+                    self.rows[keys[index]] = np.array(rows[position])
+                    self.nbytes += rows[position].nbytes
+            failed_keys = {
+                keys[order[failure.index]]: failure for failure in new_failures
+            }
+            failures = [  # every combination sharing a failed key is reported
+                failed_keys[key]._replace(index=index)
+                for index, key in enumerate(keys)
+                if key in failed_keys
+            ]
+
+        result = []
+        for key in keys:
+            if key in computed:
+                result.append(computed[key])
+            else:
+                self.rows.move_to_end(key)  # recently used
+                result.append(self.rows[key])
+        while self.nbytes > self.max_bytes and self.rows:
+            self.nbytes -= self.rows.popitem(last=False)[1].nbytes
+        return np.array(result), failures
+
+    def clear(self):
+        """forget every row"""
+        self.rows.clear()
+        self.nbytes = 0
@@ -0,0 +1,166 @@
+"""
+ file: instrumentation.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: per stage timers, counters and profiling hooks
+ brief:
+    - Stats collects, for one ExpressionClass (fs.stats)
+        - timers - wall time and number of calls of every stage (process_bode,
+          compile, evaluate_bode, render, inverse_laplace, ...), nested stages
+          are timed separately so time includes any stage called inside
+        - counters - combinations, lambdify compilations, cache hits/misses,
+          evaluated points, inverse laplace transforms, memo hits/misses
+    - count(name) can be called from any module (no access to fs needed), counts
+      go to a process wide Counter and are attributed to the Stats whose
+      outermost stage is running, counts made in executor worker processes are
+      sent back with each chunk's results and added here (executor.py)
+    - timed(stage) decorates ExpressionClass methods, Stats.stage is the same as a
+      context manager
+    - Stats.to_dict / to_json for machine readable logs, Stats.summary for text
+    - capture(profile) is an opt-in profiling hook used around process_fs
+        - "cprofile" - prints the top functions by cumulative time
+        - "tracemalloc" - prints the peak traced memory and the top allocations
+        - an output path also dumps the raw profile (pstats) or snapshot
+"""
+
+import collections
+import contextlib
+import functools
+import json
+import time
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+# pylint: disable=import-outside-toplevel
+
+PROFILES = ("cprofile", "tracemalloc")
+
+_counts = collections.Counter()  # process wide, see count
+
+
+def count(name, amount=1):
+    """add amount to the process wide counter name"""
+    _counts[name] += amount
+
+
+def counts():
+    """copy of the process wide counters"""
+    return collections.Counter(_counts)
+
+
+class Stats:
+    """stage timers and counters of one ExpressionClass"""
+
+    def __init__(self):
+        """empty timers and counters"""
+        self.timers = {}  # stage -> {"seconds": total, "calls": n}
+        self.counters = collections.Counter()
+        self._depth = 0
+        self._start_counts = None
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """time the enclosed block as stage name"""
+        if self._depth == 0:
+            self._start_counts = collections.Counter(_counts)
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            self._depth -= 1
+            timer = self.timers.setdefault(name, {"seconds": 0.0, "calls": 0})
+            timer["seconds"] += elapsed
+            timer["calls"] += 1
+            if self._depth == 0:  # counts made anywhere while this stage ran
+                self.counters.update(_counts - self._start_counts)
+
+    def count(self, name, amount=1):
+        """add amount to counter name directly"""
+        self.counters[name] += amount
+
+    def reset(self):
+        """clear every timer and counter"""
+        self.timers.clear()
+        self.counters.clear()
+
+    def to_dict(self):
+        """timers and counters as plain json serializable dicts"""
+        return {
+            "timers": {name: dict(timer) for name, timer in self.timers.items()},
+            "counters": dict(self.counters),
+        }
+
+    def to_json(self, path=None):
+        """json text of to_dict, also written to path when given"""
+        text = json.dumps(self.to_dict(), indent=2, sort_keys=True)
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(text)
+        return text
+
+    def summary(self):
+        """one line per timer and counter"""
+        lines = [
+            f"{name}: {timer['seconds']:.4f} s ({timer['calls']} calls)"
+            for name, timer in self.timers.items()
+        ]
+        lines += [f"{name}: {value}" for name, value in sorted(self.counters.items())]
+        return "\n".join(lines)
+
+
+def timed(stage):
+    """decorator timing a method as stage in self.stats"""
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.stats.stage(stage):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextlib.contextmanager
+def capture(profile=None, path=None, limit=20):
+    """opt-in profiling of the enclosed block, profile is None or in PROFILES"""
+    if profile is None:
+        yield
+        return
+    if profile not in PROFILES:
+        raise ValueError(f"profile must be one of {PROFILES}")
+
+    if profile == "cprofile":
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            if path is not None:
+                profiler.dump_stats(path)
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(limit)
+        return
+
+    import tracemalloc
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if not tracing:
+            tracemalloc.stop()
+        if path is not None:
+            snapshot.dump(path)
+        print(f"traced memory: {current} bytes current, {peak} bytes peak")
+        for statistic in snapshot.statistics("lineno")[:limit]:
+            print(statistic)
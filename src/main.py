@@ -10,22 +10,64 @@
     - process.py - implements process_fs functionality. Interfaces with the expression_class
     - expression_class.py: 
         - class methods: 
-            - timeout_handler - is invoked after trying to perform inverse laplace 
-                for 20 seconds. If so exit program as it can't be done or is to 
-                computationally intense
+            - inverse_laplace - sympy's inverse laplace runs in worker processes
+                (symbolic.py) with a real timeout (20 seconds per strategy), direct then
+                partial fractions, a failure comes back as a result instead of exiting
             - process_bode - processes all FS substitutions based on indexing 
                 - utilizes itertools to calculate all dynamic looping needed
+                - sweep="corners"/"monte_carlo"/"latin_hypercube" (sampling.py) evaluate
+                  a seeded budget of samples instead of the full product
+                - substituted values are stored as a numpy array (values_all_s),
+                  sympy is not used per combination
+            - set_limits - edit the limits of some poles/zeros and re-process, rows
+                already evaluated for unchanged combinations are reused from the
+                memo (incremental.py) by the bode and time domain evaluations, the
+                frequency and time grids are kept (regrid=True sizes new ones) so
+                the rows stay comparable
             - plot_bode - calculates frequency range and plots bode. 
                 Pass in true for extra pole/zero annotations, false for not. 
                 Too many pole/zero will get too clutter hence the option
+                - adaptive=True refines the frequency grid near poles/zeros and where
+                  the curves bend (adaptive.py) instead of 1000 log spaced points
+                - s_func is compiled once by BodeEngine (bode_engine.py) and every
+                  combination/frequency is evaluated in a single broadcast call
+                - ratios of polynomials use RationalFunction (rational.py), batched
+                  polynomial coefficients evaluated with Horner's scheme
+                - render="collection"/"envelope" draws the whole sweep as one
+                  decimated LineCollection or a min/max band around typ
+                  (rendering.py), for sweeps too large for one line per combination
+            - frequency_metrics - -3 dB bandwidth, peak gain and frequency, gain and
+                phase margins with their crossovers, for every combination at once
+                (metrics.py), numbers to screen large sweeps without plots
+            - analyze - true poles/zeros of every combination (analysis.py), stability,
+                dominant time constants and natural frequencies, used to size the
+                frequency and time grids (falls back to the max 'p' limit heuristic)
             - process_time_domain - processes the inverse laplace given a unit step 
                 (in frequency domain - 1/s)
-            - settling calc - used to determine wether a function settles or not. Because
-                function may settle for some poles/zeros and not others, and they are on the 
-                same plot, the 5 unsettled spec is not used, and the settled versus unsettled 
-                nature of the specific response is noted in the legend 
+                - default numeric mode solves every combination at once in state-space
+                  form (time_domain.py), "symbolic" mode uses sympy's inverse laplace
+                  and falls back to numeric (or "euler" numeric inversion for functions
+                  that aren't ratios of polynomials) when sympy fails
+            - numeric bode/step evaluation is split into chunks of combinations and run
+                by the executor (executor.py, serial/thread/process), failed or timed
+                out combinations are kept in failures (nan rows) instead of exiting
+            - step_metrics - settling time, rise time, overshoot, steady state and settled
+                flag for every combination at once (metrics.py), a function may settle
+                for some poles/zeros and not others on the same plot, so the settled
+                versus unsettled nature of each response is noted in the legend
             - plot_time_domain - calculates time, settling, and plots time domain response 
+                - same render modes as plot_bode
             - display_all_plots - call to show all processed plots
+            - to_store - columnar ResultStore (results_store.py) of the sweep, int8
+                limit codes, values, float32/float64 responses and metrics, saved as
+                .npy columns that reopen memory mapped (codes_all_s holds the codes)
+            - stats - per stage timers (plot_bode time includes evaluate_bode) and
+                counters (combinations, lambdify compilations, cache hits/misses,
+                evaluated points, inverse laplace calls), see instrumentation.py
+         - for sweeps too large to hold in memory, see iter_sweep/run_sweep in sweep.py
+         - for many functions in one run (shared grids, caches and compiled
+           evaluators, one batched evaluation per structure), see process_many in
+           multi_system.py
          - note that process_bode must be processed before process_time_domain due to general flow
 """
 
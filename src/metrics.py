@@ -0,0 +1,210 @@
+"""
+ file: metrics.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: vectorized response metrics for every combination at once
+ brief:
+    - step_metrics takes a (combinations x time) unit-step response array and
+      returns a structured array (STEP_DTYPE), one record per combination
+        - steady_state - mean of the last tail_fraction of the response
+        - settled - the tail stays inside the settling band around steady_state
+        - settling_time - time after which the response stays inside the band
+          (nan when not settled)
+        - rise_time - time between rise_band[0] and rise_band[1] of the change
+          from the initial value to steady_state (interpolated between samples)
+        - overshoot - percent beyond steady_state, in the direction of the change
+        - peak, peak_time - largest excursion from the initial value
+    - bands are relative to the full swing of each response (largest distance
+      from its initial value), so responses settling at or near zero work too
+    - complex responses (complex limits) use the real part
+    - frequency_metrics takes a (combinations x frequencies) complex response and
+      returns a structured array (FREQUENCY_DTYPE), one record per combination
+        - dc_gain - magnitude (dB) at the lowest frequency
+        - peak_gain, peak_frequency - largest magnitude (dB) and where it is
+        - band_low, band_high - -3 dB passband edges, where the magnitude falls
+          3 dB below peak_gain on either side of peak_frequency, band_low is 0
+          when the magnitude stays within 3 dB down to the lowest frequency
+          (lowpass), band_high is nan when it does up to the highest (highpass)
+        - bandwidth - band_high - band_low, the -3 dB corner of a lowpass and
+          w0/Q of a bandpass (relative to the peak, so a resonant lowpass is
+          measured from its resonance, not from dc_gain)
+        - gain_crossover, phase_margin - first 0 dB crossing and 180 degrees plus
+          the phase there, wrapped to (-180, 180]
+        - phase_crossover, gain_margin - first -180 degree (mod 360) crossing of
+          the unwrapped phase and minus the magnitude (dB) there
+        - crossings are found with a sign change between neighbouring samples and
+          interpolated linearly in log frequency, nan when there is none
+"""
+
+import numpy as np
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+STEP_DTYPE = np.dtype(
+    [
+        ("steady_state", float),
+        ("settled", bool),
+        ("settling_time", float),
+        ("rise_time", float),
+        ("overshoot", float),
+        ("peak", float),
+        ("peak_time", float),
+    ]
+)
+
+FREQUENCY_DTYPE = np.dtype(
+    [
+        ("dc_gain", float),
+        ("peak_gain", float),
+        ("peak_frequency", float),
+        ("bandwidth", float),
+        ("band_low", float),
+        ("band_high", float),
+        ("gain_crossover", float),
+        ("phase_margin", float),
+        ("phase_crossover", float),
+        ("gain_margin", float),
+    ]
+)
+
+
+def first_crossing(time, data, level):
+    """first time each row of data reaches level (rows), interpolated between
+    samples, nan for rows that never do
+    """
+    above = data >= level[:, np.newaxis]
+    crossed = np.any(above, axis=1)
+    index = np.argmax(above, axis=1)
+    previous = np.maximum(index - 1, 0)
+    rows = np.arange(data.shape[0])
+    y0, y1 = data[rows, previous], data[rows, index]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.where(y1 != y0, (level - y0) / (y1 - y0), 0)
+    fraction = np.clip(np.nan_to_num(fraction), 0, 1)
+    crossing = time[previous] + fraction * (time[index] - time[previous])
+    crossing = np.where(index == 0, time[0], crossing)
+    return np.where(crossed, crossing, np.nan)
+
+
+def step_metrics(
+    time, responses, settling_band=0.02, rise_band=(0.1, 0.9), tail_fraction=0.1
+):
+    """settling/rise/overshoot metrics of every step response (rows)"""
+    time = np.asarray(time, dtype=float)
+    responses = np.real(np.atleast_2d(responses)).astype(float)
+    rows = np.arange(responses.shape[0])
+    metrics = np.empty(responses.shape[0], dtype=STEP_DTYPE)
+
+    tail = max(1, int(round(tail_fraction * time.size)))
+    initial = responses[:, 0]
+    steady_state = np.mean(responses[:, -tail:], axis=1)
+    excursion = np.abs(responses - initial[:, np.newaxis])
+    swing = np.max(excursion, axis=1)
+    tolerance = settling_band * np.where(swing > 0, swing, 1.0)
+
+    # settled when the whole tail is inside the band, settling time is the
+    # sample after the last one outside of it
+    error = np.abs(responses - steady_state[:, np.newaxis])
+    outside = error > tolerance[:, np.newaxis]
+    finite = np.all(np.isfinite(responses), axis=1)
+    settled = ~np.any(outside[:, -tail:], axis=1) & finite
+    ever_outside = np.any(outside, axis=1)
+    last_outside = time.size - 1 - np.argmax(outside[:, ::-1], axis=1)
+    settling_index = np.minimum(last_outside + 1, time.size - 1)
+    settling_time = np.where(ever_outside, time[settling_index], time[0])
+
+    # normalize so every response rises from 0 to 1
+    change = steady_state - initial
+    with np.errstate(divide="ignore", invalid="ignore"):
+        normalized = (responses - initial[:, np.newaxis]) / change[:, np.newaxis]
+    moved = np.abs(change) > tolerance
+    normalized = np.where(moved[:, np.newaxis], normalized, 0)
+    low = first_crossing(time, normalized, np.full(rows.size, rise_band[0]))
+    high = first_crossing(time, normalized, np.full(rows.size, rise_band[1]))
+
+    peak_index = np.argmax(np.nan_to_num(excursion, nan=-np.inf), axis=1)
+    metrics["steady_state"] = steady_state
+    metrics["settled"] = settled
+    metrics["settling_time"] = np.where(settled, settling_time, np.nan)
+    metrics["rise_time"] = np.where(moved, high - low, np.nan)
+    overshoot = 100 * np.maximum(np.nanmax(normalized, axis=1, initial=0) - 1, 0)
+    metrics["overshoot"] = np.where(moved, overshoot, np.nan)
+    metrics["peak"] = responses[rows, peak_index]
+    metrics["peak_time"] = time[peak_index]
+    return metrics
+
+
+def sign_change(data, level):
+    """(index, fraction) of the first sign change of data - level in each row,
+    index is the sample before the change, both nan for rows without one
+    """
+    with np.errstate(invalid="ignore"):  # -inf dB (exact zeros) never crosses
+        offset = data - level[:, np.newaxis]
+        changed = (offset[:, :-1] * offset[:, 1:] <= 0) & (
+            offset[:, :-1] != offset[:, 1:]
+        )
+    found = np.any(changed, axis=1)
+    index = np.argmax(changed, axis=1)
+    rows = np.arange(data.shape[0])
+    y0, y1 = offset[rows, index], offset[rows, index + 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.clip(y0 / (y0 - y1), 0, 1)
+    return np.where(found, index, 0), np.where(found, fraction, np.nan)
+
+
+def interpolate(data, index, fraction):
+    """value of every row of data at sample index + fraction"""
+    rows = np.arange(data.shape[0])
+    y0, y1 = data[rows, index], data[rows, index + 1]
+    with np.errstate(invalid="ignore"):
+        return y0 + fraction * (y1 - y0)
+
+
+def frequency_metrics(w, h):
+    """bandwidth/peak/margin metrics of every frequency response (rows)"""
+    w = np.asarray(w, dtype=float)
+    h = np.atleast_2d(h)
+    metrics = np.empty(h.shape[0], dtype=FREQUENCY_DTYPE)
+    log_w = np.log10(w)[np.newaxis, :].repeat(h.shape[0], axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        magnitude = 20 * np.log10(np.abs(h))
+    phase = np.degrees(np.unwrap(np.nan_to_num(np.angle(h)), axis=1))
+    phase = np.where(np.isnan(h), np.nan, phase)
+
+    metrics["dc_gain"] = magnitude[:, 0]
+    peak_index = np.argmax(np.nan_to_num(magnitude, nan=-np.inf), axis=1)
+    metrics["peak_gain"] = magnitude[np.arange(h.shape[0]), peak_index]
+    metrics["peak_frequency"] = w[peak_index]
+
+    # passband edges, searched outwards from the peak on each side of it
+    level = metrics["peak_gain"] - 3
+    columns = np.arange(w.size)[np.newaxis, :]
+    peak, flat = peak_index[:, np.newaxis], metrics["peak_gain"][:, np.newaxis]
+    above = np.where(columns < peak, flat, magnitude)  # no crossing before the peak
+    index, fraction = sign_change(above, level)
+    band_high = 10 ** interpolate(log_w, index, fraction)
+    below = np.where(columns > peak, flat, magnitude)[:, ::-1]
+    index, fraction = sign_change(below, level)
+    band_low = 10 ** interpolate(log_w[:, ::-1], index, fraction)
+    metrics["band_low"] = np.where(np.isnan(band_low), 0.0, band_low)
+    metrics["band_high"] = band_high
+    metrics["bandwidth"] = metrics["band_high"] - metrics["band_low"]
+
+    index, fraction = sign_change(magnitude, np.zeros(h.shape[0]))
+    metrics["gain_crossover"] = 10 ** interpolate(log_w, index, fraction)
+    margin = 180 + interpolate(phase, index, fraction)
+    metrics["phase_margin"] = margin - 360 * np.ceil((margin - 180) / 360)
+
+    # -180 mod 360 crossings show up as a change of this (integer) winding count
+    winding = np.floor((phase + 180) / 360)
+    changed = winding[:, 1:] != winding[:, :-1]
+    found = np.any(changed & np.isfinite(winding[:, 1:]), axis=1)
+    index = np.argmax(changed, axis=1)
+    rows = np.arange(h.shape[0])
+    level = 360 * np.maximum(winding[rows, index], winding[rows, index + 1]) - 180
+    y0, y1 = phase[rows, index], phase[rows, index + 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.clip((level - y0) / (y1 - y0), 0, 1)
+    fraction = np.where(found, fraction, np.nan)
+    metrics["phase_crossover"] = 10 ** interpolate(log_w, index, fraction)
+    metrics["gain_margin"] = -interpolate(magnitude, index, fraction)
+    return metrics
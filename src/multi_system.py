@@ -0,0 +1,204 @@
+"""
+ file: multi_system.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: implements process_many, many transfer functions processed in one run
+ brief:
+    - specs are (s_func, s_var, limits) tuples, as passed to process_fs, in a
+      list (named system_0, system_1, ...) or a dict of name -> spec
+    - every system shares one DiskCache, SweepExecutor, SymbolicPool and
+      ResultMemo
+    - structurally identical functions (equal up to the names of s and the
+      poles/zeros, e.g. z1/(p1*s + 1) and k/(tau*s + 1)) are grouped
+        - canonical_order gives each system's poles/zeros a name independent
+          order, used only for the compiled evaluator and memo key (the order
+          argument of ExpressionClass), so the positional structure_key
+          (executor.py) of a group is equal and both are shared, labels, values
+          and store columns keep the order the limits were given in
+        - symmetric poles/zeros the ordering can't tell apart may leave two
+          identical structures in separate groups, never different ones together
+    - shared grids, one frequency grid and one time grid covering every system
+      (unless w/time are given), so result sets compare column for column
+    - the combinations of every member of a group are stacked and evaluated in
+      one batched executor call (bode, and numeric/euler step responses), each
+      system then reads its own rows back from the memo
+    - symbolic mode transforms one member per group, the others reuse its
+      result with their own symbols
+    - returns a MultiSystemResult
+        - w, time - the shared grids
+        - systems - name -> processed ExpressionClass
+        - stores - name -> ResultStore (results_store.py) over w and time
+        - groups - structure key -> names of the systems sharing it
+    - metric_ranges compares one metrics.py field (bandwidth, phase_margin,
+      settling_time, ...) across systems as (min, max) over each sweep
+"""
+
+import collections
+import os
+import numpy as np
+import sympy as sp
+from sympy import Symbol
+from cache import DiskCache
+from executor import SweepExecutor, bode_task, step_task, euler_task
+from incremental import ResultMemo
+from process import build_fs
+from results_store import DEFAULT_DTYPE
+from symbolic import SymbolicPool, SymbolicResult
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+MultiSystemResult = collections.namedtuple(
+    "MultiSystemResult", ["w", "time", "systems", "stores", "groups"]
+)
+
+
+def canonical_order(s_func, s_var, pz):
+    """pz sorted on a name independent signature, the srepr of s_func with that
+    pole/zero marked and s and every other pole/zero renamed alike
+    """
+    marked, other = Symbol("_marked"), Symbol("_other")
+
+    def signature(name):
+        mapping = {s_var: Symbol("_s")}
+        mapping.update({Symbol(each): other for each in pz})
+        mapping[Symbol(name)] = marked
+        return sp.srepr(s_func.xreplace(mapping))
+
+    return sorted(pz, key=signature)  # stable, ties keep the given order
+
+
+def shared_frequency_grid(systems, points=1000):
+    """log spaced grid covering the frequency_grid of every system"""
+    ranges = np.array([fs.frequency_grid(2) for fs in systems])
+    return np.logspace(np.log10(ranges[:, 0].min()), np.log10(ranges[:, 1].max()), points)
+
+
+def shared_time_grid(systems, points=1000):
+    """uniform grid covering the time_grid of every system"""
+    return np.linspace(0, max(fs.time_grid(2)[-1] for fs in systems), points)
+
+
+def evaluate_group(members, w, time, time_domain):
+    """evaluate the stacked combinations of a group in one call per kind, the
+    rows are kept in the shared memo for each member
+    """
+    lead = members[0]
+    # every member's values in the pz order of lead, through the shared key order
+    values = np.concatenate(
+        [lead.unkeyed(fs.keyed(fs.values_all_s)) for fs in members]
+    )
+    lead.sweep_task("bode", bode_task, w, values)
+    rational = lead.bode_engine.rational
+    if time is None:
+        return
+    if time_domain == "euler":
+        lead.sweep_task("euler", euler_task, time, values)
+    elif (
+        time_domain == "numeric"
+        and rational is not None
+        and rational.num_degree <= rational.den_degree
+    ):
+        lead.sweep_task("step", step_task, time, values)
+
+
+def shared_symbolic_result(lead, fs):
+    """SymbolicResult of lead (already transformed) in the symbols of fs, None
+    when lead has none
+    """
+    if lead.t_func is None:
+        return lead.symbolic_result  # failed, fs falls back without retrying
+    mapping = {
+        Symbol(lead.pz[old]): Symbol(fs.pz[new])
+        for old, new in zip(lead.order, fs.order)
+    }
+    strategy = "cache" if lead.symbolic_result is None else lead.symbolic_result.strategy
+    return SymbolicResult(lead.t_func.xreplace(mapping), strategy, None, 0.0)
+
+
+def process_many(
+    specs,
+    time_domain="numeric",
+    points=1000,
+    w=None,
+    time=None,
+    use_cache=True,
+    executor=None,
+    memo=None,
+    symbolic=None,
+    dtype=DEFAULT_DTYPE,
+    path=None,
+    **options,
+):
+    """process every (s_func, s_var, limits) spec with shared grids and work,
+    returns a MultiSystemResult
+    time_domain - "numeric", "symbolic", "euler" (see process_time_domain) or
+        "none"
+    memo - the shared ResultMemo, carries the batched rows to each system, size
+        it for the combinations x points of the largest group
+    path - directory to save every store to (path/<name>)
+    options (sweep, samples, seed, distribution) apply to every system
+    raises ValueError for a spec process_fs would reject
+    """
+    if isinstance(specs, dict):
+        named = list(specs.items())
+    else:
+        named = [(f"system_{index}", spec) for index, spec in enumerate(specs)]
+    cache = DiskCache() if use_cache else None
+    executor = executor if executor is not None else SweepExecutor()
+    memo = memo if memo is not None else ResultMemo()
+    symbolic = symbolic if symbolic is not None else SymbolicPool()
+
+    systems, groups = {}, {}
+    for name, (s_func, s_var, limits) in named:
+        fs = build_fs(
+            s_func,
+            s_var,
+            limits,
+            use_cache=use_cache,
+            executor=executor,
+            cache=cache,
+            memo=memo,
+            symbolic=symbolic,
+            order=canonical_order(s_func, s_var, list(limits)),
+            **options,
+        )
+        fs.process_bode()
+        systems[name] = fs
+        groups.setdefault(fs.memo_key[0], []).append(name)
+
+    w = shared_frequency_grid(systems.values(), points) if w is None else np.asarray(w)
+    if time_domain != "none":
+        time = shared_time_grid(systems.values(), points) if time is None else np.asarray(time)
+    else:
+        time = None
+
+    stores = {}
+    for names in groups.values():
+        members = [systems[name] for name in names]
+        evaluate_group(members, w, time, time_domain)
+        for fs in members:
+            if time is not None:
+                result = None
+                if time_domain == "symbolic" and fs is not members[0]:
+                    result = shared_symbolic_result(members[0], fs)
+                fs.process_time_domain(mode=time_domain, time=time, symbolic_result=result)
+        for name, fs in zip(names, members):
+            store_path = None if path is None else os.path.join(path, name)
+            stores[name] = fs.to_store(w, dtype=dtype, path=store_path)
+
+    stores = {name: stores[name] for name in systems}  # in spec order
+    return MultiSystemResult(w, time, systems, stores, groups)
+
+
+def metric_ranges(result, field):
+    """name -> (min, max) of a FREQUENCY_DTYPE or STEP_DTYPE field (metrics.py)
+    over each system's sweep, nan when a system has no finite value
+    """
+    ranges = {}
+    for name, store in result.stores.items():
+        column = "frequency_metrics"
+        if field not in store[column].dtype.names:
+            column = "step_metrics"
+        data = np.asarray(store[column][field], dtype=float)
+        finite = data[np.isfinite(data)]
+        ranges[name] = (finite.min(), finite.max()) if finite.size else (np.nan, np.nan)
+    return ranges
@@ -18,18 +18,29 @@
             - 3 is three values or 'min', 'typ', 'max'
         - s_var - symbol to substitute jw in (normally 's' by convention)
         - s_func - provided s_func
+        - cache - on-disk DiskCache (cache.py) unless use_cache=False, so repeated
+          runs of the same function skip all symbolic work
+    - parse_limits/build_fs raise ValueError instead of exiting (used by batch.py
+      and multi_system.py), process_fs prints the error and exits as before
+    - build_fs takes an existing cache (and executor, memo, symbolic pool) so
+      many systems can share them
+    - process_fs options for production logs (instrumentation.py)
+        - profile="cprofile"/"tracemalloc" - opt-in capture around the whole run,
+          profile_path also dumps the raw profile/snapshot
+        - stats_path - writes fs.stats (stage timers and counters) as json
 """
 
 import sys
 from sympy import Symbol
 from expression_class import ExpressionClass
+from cache import DiskCache
+from instrumentation import capture
 
 
-def process_fs(s_domain_func, s_var, limits):
-    """process_fs function implementation"""
-    print(f"Processing function '{s_domain_func}'")
-    print(f"Using '{s_var}' and the following limits:")
-    print(limits)
+def parse_limits(s_domain_func, limits):
+    """parse and check limits, returns (keys, limit_values, limit_values_type)
+    raises ValueError describing the first problem found
+    """
     keys = list(limits.keys())  # split dict for ease of looping and using class later
     limit_values = list(limits.values())
     limit_values_type = [] # see type explanation in file header
@@ -41,32 +52,70 @@ def process_fs(s_domain_func, s_var, limits):
             if temp_tuple == tuple(sorted(temp_tuple)):  # check ascending order
                 limit_values_type.append(len(value))
             else:
-                print("tuple is not in ascending order")
-                sys.exit(1)
+                raise ValueError("tuple is not in ascending order")
         else:  # if single number, check its a number
             try:
                 float(abs(value)) # can we do this operation?
-            except:
-                print("Error, number is not supplied.")
-                sys.exit(1)
+            except Exception as error:
+                raise ValueError("Error, number is not supplied.") from error
             limit_values_type.append(1)  # type is 1 for this index
             limit_values[index] = (value,)  # append as if it were a tuple
 
     for pz in keys:  # check all poles/zeros are represented in the passed function
         if Symbol(pz) not in s_domain_func.free_symbols:
-            print("Discrepancy between s-domain-function and pole/zero's provided")
-            sys.exit(1)
+            raise ValueError("Discrepancy between s-domain-function and pole/zero's provided")
+
+    return keys, limit_values, limit_values_type
+
 
-    fs = ExpressionClass(  # instantiate ExpressionClass with parsed values
+def build_fs(
+    s_domain_func, s_var, limits, use_cache=True, executor=None, cache=None, **options
+):
+    """parse limits and instantiate ExpressionClass, raises ValueError on bad input
+    cache - a DiskCache to share, a new one (use_cache) when None
+    options (sweep, samples, seed, distribution, symbolic, memo, order) are passed
+    on to ExpressionClass
+    """
+    keys, limit_values, limit_values_type = parse_limits(s_domain_func, limits)
+    if cache is None and use_cache:
+        cache = DiskCache()
+    return ExpressionClass(  # instantiate ExpressionClass with parsed values
         limits=limit_values,
         pz=keys,
         s_var=s_var,
         s_func=s_domain_func,
         type=limit_values_type,
+        cache=cache,
+        executor=executor,
+        **options,
     )
 
-    fs.process_bode()
-    fs.plot_bode(annotate_plot=True)
-    fs.process_time_domain()
-    fs.plot_time_domain()
+
+def process_fs(
+    s_domain_func,
+    s_var,
+    limits,
+    use_cache=True,
+    profile=None,
+    profile_path=None,
+    stats_path=None,
+):
+    """process_fs function implementation, returns the processed fs"""
+    print(f"Processing function '{s_domain_func}'")
+    print(f"Using '{s_var}' and the following limits:")
+    print(limits)
+    try:
+        fs = build_fs(s_domain_func, s_var, limits, use_cache=use_cache)
+    except ValueError as error:
+        print(error)
+        sys.exit(1)
+
+    with capture(profile, profile_path):
+        fs.process_bode()
+        fs.plot_bode(annotate_plot=True)
+        fs.process_time_domain()
+        fs.plot_time_domain()
+    if stats_path is not None:
+        fs.stats.to_json(stats_path)
     fs.display_all_plots()
+    return fs
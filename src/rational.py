@@ -0,0 +1,147 @@
+"""
+ file: rational.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: implements RationalFunction
+ brief:
+    - numeric backend for s-domain functions that are a ratio of polynomials in s
+    - sympy is only used once, in the constructor:
+        - sp.together/sp.fraction split s_func into numerator and denominator
+        - sp.Poly gives the coefficients (highest power of s first) as expressions
+          of the pole/zero symbols
+        - numerator and denominator coefficient lists are lambdified once
+        - optionally cached on disk (cache.py), so warm runs skip all of the above
+    - coefficients fills a (combinations x degree + 1) array for a batch of values
+    - horner evaluates a batch of polynomials over a batch of points
+    - response evaluates N(jw)/D(jw) for every combination and frequency
+    - batched_roots finds the roots of every row of a coefficient array with one
+      batched companion matrix eigenvalue solve
+    - is_rational can be used to check if s_func is supported before constructing,
+      the constructor raises ValueError otherwise
+"""
+
+import sympy as sp
+import numpy as np
+from cache import evaluator_source, load_evaluator
+from instrumentation import count
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+
+def is_rational(s_func, s_var):
+    """True if s_func is a ratio of polynomials in s_var"""
+    num, den = sp.fraction(sp.together(s_func))
+    return num.is_polynomial(s_var) and den.is_polynomial(s_var)
+
+
+def horner(coeffs, x):
+    """evaluate polynomials with coeffs (rows, highest power first) at x (columns)
+    returns an array shaped (rows, len(x))
+    """
+    coeffs = np.atleast_2d(coeffs)
+    x = np.asarray(x)[np.newaxis, :]
+    result = np.broadcast_to(coeffs[:, 0:1], (coeffs.shape[0], x.shape[1])).copy()
+    for index in range(1, coeffs.shape[1]):
+        result = result * x + coeffs[:, index : index + 1]
+    return result
+
+
+class RationalFunction:
+    """s_func compiled to batched numerator/denominator polynomial coefficients"""
+
+    def __init__(self, s_func, s_var, pz, cache=None):
+        """split s_func into polynomials once and compile their coefficients
+        with a cache (cache.py), a warm start loads the compiled coefficients and
+        does no symbolic work at all
+        """
+        self.s_var = s_var
+        self.pz = list(pz)
+        self.symbols = [sp.Symbol(name) for name in self.pz]
+
+        key, entry = None, None
+        if cache is not None:
+            key = cache.key("rational", s_func, s_var, *self.symbols)
+            entry = cache.get(key)
+        if entry is None:
+            entry = self._compile(s_func, s_var)
+            if cache is not None:
+                cache.put(key, entry)
+        if not entry["rational"]:
+            raise ValueError(f"{s_func} is not a ratio of polynomials in {s_var}")
+
+        self.num_degree = entry["num_degree"]
+        self.den_degree = entry["den_degree"]
+        self.num_lambda = load_evaluator(entry["num"])
+        self.den_lambda = load_evaluator(entry["den"])
+
+    def _compile(self, s_func, s_var):
+        """symbolic work, returns a cacheable entry with the evaluator sources"""
+        num, den = sp.fraction(sp.together(s_func))
+        if not (num.is_polynomial(s_var) and den.is_polynomial(s_var)):
+            return {"rational": False}
+        num_exprs = sp.Poly(num, s_var).all_coeffs()  # highest power first
+        den_exprs = sp.Poly(den, s_var).all_coeffs()
+        count("lambdify", 2)
+        return {
+            "rational": True,
+            "num_degree": len(num_exprs) - 1,
+            "den_degree": len(den_exprs) - 1,
+            "num": evaluator_source(sp.lambdify(self.symbols, num_exprs, "numpy")),
+            "den": evaluator_source(sp.lambdify(self.symbols, den_exprs, "numpy")),
+        }
+
+    def _fill(self, coeff_lambda, values):
+        """fill a (combinations x degree + 1) array from a coefficient lambda"""
+        values = np.atleast_2d(np.asarray(values))
+        params = [values[:, index] for index in range(len(self.pz))]
+        coeffs = coeff_lambda(*params)
+        # constant coefficients come back as scalars, broadcast them to every row
+        return np.stack(
+            [
+                np.broadcast_to(np.asarray(coeff, dtype=complex), (values.shape[0],))
+                for coeff in coeffs
+            ],
+            axis=1,
+        )
+
+    def coefficients(self, values):
+        """return (numerator, denominator) coefficient arrays for every combination"""
+        return self._fill(self.num_lambda, values), self._fill(self.den_lambda, values)
+
+    def response(self, values, w):
+        """complex response H(jw) for every combination (rows) and frequency (columns)"""
+        return self.transfer(values, 1j * np.asarray(w, dtype=float))
+
+    def transfer(self, values, s):
+        """H(s) for every combination (rows) and complex point s (columns)"""
+        num, den = self.coefficients(values)
+        s = np.asarray(s, dtype=complex)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            return horner(num, s) / horner(den, s)
+
+
+def batched_roots(coeffs):
+    """roots of every polynomial in coeffs (rows, highest power first)
+    one batched companion matrix eigenvalue solve for all rows, returns a
+    (rows x degree) complex array, nan padded where the leading coefficient(s)
+    of a row are zero (lower degree than the rest)
+    """
+    coeffs = np.atleast_2d(np.asarray(coeffs, dtype=complex))
+    rows, degree = coeffs.shape[0], coeffs.shape[1] - 1
+    roots = np.full((rows, max(degree, 0)), np.nan, dtype=complex)
+    if degree < 1:
+        return roots
+
+    full = coeffs[:, 0] != 0
+    if np.any(full):
+        monic = coeffs[full, 1:] / coeffs[full, 0:1]
+        companion = np.zeros((monic.shape[0], degree, degree), dtype=complex)
+        companion[:, 0, :] = -monic
+        companion[:, 1:, :-1] += np.eye(degree - 1)
+        roots[full] = np.linalg.eigvals(companion)
+
+    for row in np.flatnonzero(~full):  # rare, degree drops for this combination
+        nonzero = np.flatnonzero(coeffs[row])
+        if nonzero.size:
+            row_roots = np.roots(coeffs[row, nonzero[0] :])
+            roots[row, : row_roots.size] = row_roots
+    return roots
@@ -0,0 +1,154 @@
+"""
+ file: rendering.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: scalable rendering of many response curves
+ brief:
+    - render modes for plot_bode/plot_time_domain (RENDER_MODES)
+        - "lines" - one line and legend entry per combination, the original
+          behaviour, fine for tens of combinations
+        - "collection" - every combination in one LineCollection with a single
+          legend entry, curves decimated to at most max_points points each
+        - "envelope" - the min/max band across the sweep shaded with
+          fill_between, plus the typ combination (or the median) as a line
+    - decimate keeps the min and max of every bucket of points (per curve), so
+      peaks and resonances survive decimation
+    - annotate_poles_zeros places one annotation per distinct pole/zero value
+      (not per combination), all positions found with one searchsorted
+    - collections and envelopes are rasterized, save_figure writes any format
+      (png, pdf, svg) with them embedded as images at dpi, so vector files don't
+      grow with the sweep
+    - cost as the sweep grows: "lines" pays per artist and legend entry,
+      "collection" only per (decimated) point, "envelope" draws a fixed number
+      of artists and stays nearly constant
+    - matplotlib is only imported when drawing
+"""
+
+import numpy as np
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+# pylint: disable=import-outside-toplevel
+
+RENDER_MODES = ("lines", "collection", "envelope")
+DEFAULT_MAX_POINTS = 1000  # per curve after decimation, ~2 per pixel column
+
+
+def decimate(x, y, max_points=DEFAULT_MAX_POINTS):
+    """(x, y) with every row of y reduced to at most max_points points, the
+    min and max of each bucket of neighbouring points in their original order
+    x is 1-D (shared), the returned x has one row per row of y
+    """
+    y = np.atleast_2d(y)
+    x = np.asarray(x)
+    points = y.shape[1]
+    if points <= max_points:
+        return np.broadcast_to(x, y.shape), y
+    size = int(np.ceil(points / (max_points // 2)))  # points per bucket
+    buckets = int(np.ceil(points / size))
+    finite = np.nan_to_num(y, nan=np.nan, posinf=np.nan, neginf=np.nan)
+    if buckets * size > points:  # repeat the last point to fill the last bucket
+        finite = np.pad(finite, ((0, 0), (0, buckets * size - points)), mode="edge")
+    blocks = finite.reshape(y.shape[0], buckets, size)  # a view, no copy
+
+    nan = np.isnan(blocks)
+    low = np.argmin(np.where(nan, np.inf, blocks), axis=2)
+    high = np.argmax(np.where(nan, -np.inf, blocks), axis=2)
+    first = np.minimum(low, high)  # keep the pair in the order it occurs
+    second = np.maximum(low, high)
+    picks = np.stack([first, second], axis=2) + (np.arange(buckets) * size)[
+        :, np.newaxis
+    ]
+    picks = np.minimum(picks.reshape(y.shape[0], -1), points - 1)
+    return x[picks], np.take_along_axis(y, picks, axis=1)
+
+
+def add_collection(ax, x, y, max_points=DEFAULT_MAX_POINTS, label=None, cmap="viridis"):
+    """draw every row of y against x as one rasterized LineCollection"""
+    from matplotlib.collections import LineCollection
+    import matplotlib.pyplot as plt
+
+    xs, ys = decimate(x, np.real(y), max_points)
+    segments = np.stack([xs, ys], axis=2)
+    colors = plt.get_cmap(cmap)(np.linspace(0, 1, max(len(segments), 1)))
+    collection = LineCollection(
+        segments, colors=colors, linewidths=0.8, rasterized=True, label=label
+    )
+    ax.add_collection(collection, autolim=False)  # limits from the points below
+    finite = np.isfinite(ys)
+    if np.any(finite):
+        ax.update_datalim(np.column_stack([xs[finite], ys[finite]]))
+    ax.autoscale_view()
+    return collection
+
+
+def add_envelope(ax, x, y, typ=None, label=None):
+    """shade min..max of y across rows, typ (a row index) drawn as a line, the
+    median across rows when typ is None
+    """
+    y = np.real(np.atleast_2d(y))
+    with np.errstate(invalid="ignore"):  # all nan columns stay nan
+        low = np.nanmin(np.where(np.isfinite(y), y, np.nan), axis=0)
+        high = np.nanmax(np.where(np.isfinite(y), y, np.nan), axis=0)
+        center = y[typ] if typ is not None else np.nanmedian(y, axis=0)
+    band = ax.fill_between(
+        x, low, high, alpha=0.3, rasterized=True, label=f"{label} min/max"
+    )
+    (line,) = ax.plot(x, center, label=f"{label} {'typ' if typ is not None else 'median'}")
+    return band, line
+
+
+def draw(ax, x, y, mode, labels=None, typ=None, max_points=DEFAULT_MAX_POINTS, log_x=False):
+    """draw the rows of y against x on ax in one of RENDER_MODES"""
+    if mode not in RENDER_MODES:
+        raise ValueError(f"render mode must be one of {RENDER_MODES}")
+    if log_x:
+        ax.set_xscale("log")
+    count = np.atleast_2d(y).shape[0]
+    if mode == "lines":  # no legend entries unless labels are given
+        labels = [None] * count if labels is None else labels
+        for row, label in zip(np.atleast_2d(y), labels):
+            ax.plot(x, row, label=None if label is None else str(label))
+    elif mode == "collection":
+        add_collection(ax, x, y, max_points, label=f"{count} combinations")
+    else:
+        add_envelope(ax, x, y, typ, label=f"{count} combinations")
+
+
+def annotate_poles_zeros(ax, w, magnitude, names, values):
+    """one arrow per distinct (name, value), names/values are per pole/zero
+    columns of the sweep values, placed on the top of the magnitude curves
+    """
+    w = np.asarray(w)
+    top = np.nanmax(np.where(np.isfinite(magnitude), magnitude, np.nan), axis=0)
+    texts, xs = [], []
+    for column, name in enumerate(names):
+        distinct = np.unique(np.asarray(values)[:, column])
+        for value in distinct:
+            texts.append(f"{name} = {value}")
+            xs.append(abs(1 / value) if name[0] == "p" else abs(value))
+    if not xs:
+        return
+    xs = np.asarray(xs, dtype=float)
+    index = np.clip(np.searchsorted(w, xs), 0, w.size - 1)
+    ys = top[index]
+    # repeated positions are shifted apart so the arrows don't overlap
+    order = np.argsort(xs, kind="stable")
+    position = np.arange(xs.size)
+    starts = np.r_[True, xs[order][1:] != xs[order][:-1]]
+    rank = position - np.maximum.accumulate(np.where(starts, position, 0))
+    shift = np.empty(xs.size)
+    shift[order] = rank * 10
+    for text, x, y, dx in zip(texts, xs, ys, shift):
+        ax.annotate(
+            text,
+            xy=(x, y),
+            xytext=(x + dx, y - 20),
+            arrowprops=dict(facecolor="black", shrink=0.05),
+        )
+
+
+def save_figure(figure, path, dpi=150):
+    """write a figure to path (format from the extension), rasterized artists
+    are embedded as images at dpi
+    """
+    figure.savefig(path, dpi=dpi)
+    return path
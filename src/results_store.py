@@ -0,0 +1,275 @@
+"""
+ file: results_store.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: implements ResultStore, columnar (optionally memory mapped) sweep results
+ brief:
+    - one row per combination, every column is a numpy array with rows first
+        - codes - (combinations x poles/zeros) int8, index into each limit
+          (min/typ/max, see LIMIT_NAMES in sampling.py) or SAMPLED (-1)
+        - values - (combinations x poles/zeros) substituted values, float64 or
+          complex128
+        - responses - (combinations x points) float32 (DEFAULT_DTYPE) or float64,
+          magnitude/phase over the "w" grid, response over the "time" grid
+        - metrics - the structured arrays of metrics.py
+    - grids (w, time) are shared 1-D arrays, stored once
+    - labels are rebuilt from codes when needed (labels), not kept per row
+    - save writes a directory, one .npy per column and grid plus meta.json
+      (pole/zero names, limits, function, dtypes, shapes, which grid a
+      response column is over)
+    - open memory maps every column (np.load mmap_mode="r"), nothing is read
+      until it is sliced, so downstream analysis only reads what it needs
+    - store[rows] (int, slice, mask or index array) is a new store over those
+      rows, store["magnitude"] a column, select(p1="typ") a row mask
+    - create preallocates the column files on disk (np.lib.format.open_memmap)
+      for sweeps larger than memory, write fills them in row blocks (StoreSink
+      in sweep.py)
+"""
+
+import json
+import os
+import numpy as np
+from sampling import LIMIT_NAMES, SAMPLED
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+STORE_VERSION = 1
+DEFAULT_DTYPE = np.float32  # responses, ~7 significant digits
+META_FILE = "meta.json"
+
+
+def encode_value(value):
+    """json form of a limit value, complex values as strings"""
+    value = complex(value)
+    return value.real if value.imag == 0 else str(value)
+
+
+def decode_value(value):
+    """inverse of encode_value"""
+    return complex(value) if isinstance(value, str) else value
+
+
+def values_dtype(limits):
+    """complex128 if any limit is complex, float64 otherwise"""
+    return np.result_type(float, *[np.asarray(limit) for limit in limits])
+
+
+class ResultStore:
+    """columns of one sweep, rows are combinations"""
+
+    def __init__(self, pz, type, codes, values, limits=None, function=None):
+        """store holding only codes and values, responses are added with add"""
+        self.pz = list(pz)
+        self.type = [int(size) for size in type]
+        self.limits = limits  # per pole/zero tuples of values, None if unknown
+        self.function = function  # text of s_func
+        self.columns = {
+            "codes": np.asarray(codes, dtype=np.int8),
+            "values": np.asarray(values),
+        }
+        self.grids = {}  # name -> shared 1-D array
+        self.column_grids = {}  # column -> name of the grid it is over
+        self.path = None  # directory, once saved/opened/created
+
+    def __len__(self):
+        """number of combinations"""
+        return len(self.columns["codes"])
+
+    def __contains__(self, name):
+        """true for a column or grid name"""
+        return name in self.columns or name in self.grids
+
+    def __getitem__(self, key):
+        """column or grid by name, otherwise a store over the selected rows"""
+        if isinstance(key, str):
+            return self.columns[key] if key in self.columns else self.grids[key]
+        return self.take(key)
+
+    def add_grid(self, name, grid):
+        """add a shared grid (w, time)"""
+        self.grids[name] = np.asarray(grid)
+
+    def add(self, name, data, grid=None, dtype=None):
+        """add a column, one row per combination, over grid if given"""
+        data = np.asarray(data) if dtype is None else np.asarray(data, dtype=dtype)
+        if len(data) != len(self):
+            raise ValueError(f"column '{name}' has {len(data)} rows, not {len(self)}")
+        if grid is not None:
+            if data.shape[1:] != self.grids[grid].shape:
+                raise ValueError(f"column '{name}' doesn't match grid '{grid}'")
+            self.column_grids[name] = grid
+        self.columns[name] = data
+
+    def take(self, rows):
+        """new store over rows, a view of the columns for an int or slice"""
+        if isinstance(rows, (int, np.integer)):
+            rows = slice(rows, rows + 1 if rows != -1 else None)
+        store = ResultStore(
+            self.pz,
+            self.type,
+            self.columns["codes"][rows],
+            self.columns["values"][rows],
+            self.limits,
+            self.function,
+        )
+        for name, data in self.columns.items():
+            store.columns[name] = data[rows]
+        store.grids = dict(self.grids)
+        store.column_grids = dict(self.column_grids)
+        return store
+
+    def select(self, **choices):
+        """row mask of combinations with pole/zero at a limit name ("min", "typ",
+        "max", "smp") or value, e.g. select(p1="typ", z1=3)
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for name, choice in choices.items():
+            dimension = self.pz.index(name)
+            if isinstance(choice, str):
+                names = LIMIT_NAMES[self.type[dimension]]
+                code = SAMPLED if choice == "smp" else names.index(choice)
+                mask &= self.columns["codes"][:, dimension] == code
+            else:
+                mask &= self.columns["values"][:, dimension] == choice
+        return mask
+
+    def labels(self, rows=None):
+        """legend labels, ['p1', 'typ', 'p2', 'min'] etc., of rows (default all)"""
+        codes = self.columns["codes"] if rows is None else self.columns["codes"][rows]
+        return [
+            [
+                val
+                for dimension, code in enumerate(row)
+                for val in (
+                    self.pz[dimension],
+                    "smp" if code == SAMPLED else LIMIT_NAMES[self.type[dimension]][code],
+                )
+            ]
+            for row in np.atleast_2d(codes).tolist()
+        ]
+
+    def meta(self, rows=None):
+        """json serializable description of the store"""
+        return {
+            "version": STORE_VERSION,
+            "rows": len(self) if rows is None else rows,
+            "pz": self.pz,
+            "type": self.type,
+            "limits": None
+            if self.limits is None
+            else [[encode_value(val) for val in limit] for limit in self.limits],
+            "function": self.function,
+            "columns": {
+                name: {
+                    "dtype": str(data.dtype),
+                    "shape": list(data.shape[1:]),
+                    "grid": self.column_grids.get(name),
+                }
+                for name, data in self.columns.items()
+            },
+            "grids": list(self.grids),
+        }
+
+    def write_meta(self, rows=None):
+        """(re)write meta.json of a store on disk"""
+        with open(os.path.join(self.path, META_FILE), "w", encoding="utf-8") as handle:
+            json.dump(self.meta(rows), handle, indent=2)
+
+    def save(self, path):
+        """write every column and grid to the directory path, returns path"""
+        os.makedirs(path, exist_ok=True)
+        for name, data in self.columns.items():
+            np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(data))
+        for name, grid in self.grids.items():
+            np.save(os.path.join(path, f"grid_{name}.npy"), grid)
+        self.path = path
+        self.write_meta()
+        return path
+
+    @classmethod
+    def open(cls, path, mmap=True):
+        """store saved in path, columns memory mapped (read only) unless mmap=False"""
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as handle:
+            meta = json.load(handle)
+        if meta["version"] != STORE_VERSION:
+            raise ValueError(f"unsupported store version {meta['version']}")
+        mode = "r" if mmap else None
+        rows = meta["rows"]
+
+        def load(file):
+            """one column, cut to the rows written"""
+            data = np.load(os.path.join(path, file), mmap_mode=mode)
+            return data[:rows] if data.ndim and len(data) != rows else data
+
+        limits = meta["limits"]
+        if limits is not None:
+            limits = [tuple(decode_value(val) for val in limit) for limit in limits]
+        store = cls(
+            meta["pz"],
+            meta["type"],
+            load("codes.npy"),
+            load("values.npy"),
+            limits,
+            meta["function"],
+        )
+        for name in meta["grids"]:
+            store.grids[name] = np.load(os.path.join(path, f"grid_{name}.npy"))
+        for name, column in meta["columns"].items():
+            store.columns[name] = load(f"{name}.npy")
+            if column["grid"] is not None:
+                store.column_grids[name] = column["grid"]
+        store.path = path
+        return store
+
+    @classmethod
+    def create(
+        cls,
+        path,
+        pz,
+        type,
+        rows,
+        limits,
+        grids,
+        columns,
+        function=None,
+        dtype=DEFAULT_DTYPE,
+    ):
+        """empty store of rows combinations backed by files in path, written
+        with write, grids is {name: grid}, columns is {name: grid name} for the
+        response columns (dtype)
+        """
+        os.makedirs(path, exist_ok=True)
+
+        def allocate(name, dtype, shape):
+            """zero filled column file, memory mapped for writing"""
+            file = os.path.join(path, f"{name}.npy")
+            return np.lib.format.open_memmap(file, mode="w+", dtype=dtype, shape=shape)
+
+        store = cls(
+            pz,
+            type,
+            allocate("codes", np.int8, (rows, len(pz))),
+            allocate("values", values_dtype(limits), (rows, len(pz))),
+            limits,
+            function,
+        )
+        for name, grid in grids.items():
+            store.add_grid(name, grid)
+            np.save(os.path.join(path, f"grid_{name}.npy"), store.grids[name])
+        for name, grid in columns.items():
+            store.columns[name] = allocate(name, dtype, (rows,) + store.grids[grid].shape)
+            store.column_grids[name] = grid
+        store.path = path
+        store.write_meta(rows=0)
+        return store
+
+    def write(self, start, **columns):
+        """fill rows start.. of a created store, one keyword per column"""
+        for name, data in columns.items():
+            self.columns[name][start : start + len(data)] = data
+
+    def flush(self, rows=None):
+        """flush written rows to disk, rows is how many are valid (default all)"""
+        for data in self.columns.values():
+            if isinstance(data, np.memmap):
+                data.flush()
+        self.write_meta(rows)
@@ -0,0 +1,120 @@
+"""
+ file: sampling.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: sweep strategies for choosing which combinations to evaluate
+ brief:
+    - "product" - every combination of every limit (itertools.product), 3^N for N
+      min/typ/max limits, the original behaviour
+    - "corners" - every combination of min/max only (typ is skipped when a max is
+      given), 2^N, randomly thinned to the budget when larger than it
+    - "monte_carlo" - budget independent random draws
+    - "latin_hypercube" - budget draws, one per stratum of every parameter
+    - random draws use a per parameter distribution derived from its limits
+        - 1 value (typ) - constant
+        - 2 values (min, max) - uniform between them
+        - 3 values (min, typ, max) - triangular, peaking at typ ("triangular", the
+          default) or uniform between min and max ("uniform")
+        - complex limits are sampled along the straight path min -> typ -> max
+    - sample_combinations returns (codes, values)
+        - codes - (budget x parameters) int array, index into each limit, or
+          SAMPLED (-1) for a value drawn from its distribution
+        - values - (budget x parameters) array of substituted values
+    - cost scales with the budget, never with the size of the full product
+"""
+
+import numpy as np
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+SWEEP_STRATEGIES = ("product", "corners", "monte_carlo", "latin_hypercube")
+DISTRIBUTIONS = ("triangular", "uniform")
+SAMPLED = -1  # code for a value drawn from a distribution, not a listed limit
+# label for each index of a limit, keyed on its type (number of values supplied)
+LIMIT_NAMES = {1: ("typ",), 2: ("min", "max"), 3: ("min", "typ", "max")}
+
+
+def corner_codes(type, budget=None, rng=None):
+    """index codes of the min/max corners (typ only for single value limits)
+    every corner in product order, or a random budget of them, without ever
+    listing all 2^N when the budget is smaller
+    """
+    radices = [1 if size == 1 else 2 for size in type]
+    count = int(np.prod(radices, dtype=object))
+    if budget is None or count <= budget:
+        numbers = np.arange(count, dtype=np.int64)
+    else:
+        numbers = np.sort(rng.choice(count, budget, replace=False))
+    codes = np.zeros((len(numbers), len(type)), dtype=int)
+    for dim in reversed(range(len(type))):  # last limit varies fastest
+        digit = numbers % radices[dim]
+        numbers = numbers // radices[dim]
+        codes[:, dim] = np.where(digit == 1, type[dim] - 1, 0)
+    return codes
+
+
+def unit_samples(strategy, budget, dimensions, rng):
+    """(budget x dimensions) samples in [0, 1)"""
+    if strategy == "monte_carlo":
+        return rng.random((budget, dimensions))
+    # latin hypercube, each column has exactly one sample per 1/budget stratum
+    strata = np.argsort(rng.random((budget, dimensions)), axis=0)
+    return (strata + rng.random((budget, dimensions))) / budget
+
+
+def limit_values(limit, u, distribution="triangular"):
+    """map unit samples u onto the distribution of one limit"""
+    limit = np.asarray(limit)
+    if limit.size == 1:
+        return np.full(u.shape, limit[0], dtype=limit.dtype)
+    if limit.size == 2 or distribution == "uniform":
+        return limit[0] + (limit[-1] - limit[0]) * u
+
+    # triangular along the path min -> typ -> max, mode at typ
+    low_leg = abs(limit[1] - limit[0])
+    high_leg = abs(limit[2] - limit[1])
+    length = low_leg + high_leg
+    if length == 0:
+        return np.full(u.shape, limit[0], dtype=limit.dtype)
+    mode = low_leg / length
+    x = np.where(
+        u < mode,
+        np.sqrt(u * mode),
+        1 - np.sqrt((1 - u) * (1 - mode)),
+    )  # inverse cdf of the triangular distribution on [0, 1]
+    distance = x * length
+    low = limit[0] + (limit[1] - limit[0]) * (distance / low_leg if low_leg else 0)
+    high = limit[1] + (limit[2] - limit[1]) * (
+        (distance - low_leg) / high_leg if high_leg else 0
+    )
+    return np.where(distance <= low_leg, low, high)
+
+
+def sample_combinations(
+    limits, type, strategy, budget=None, seed=None, distribution="triangular"
+):
+    """(codes, values) for the non-product strategies, see the file header"""
+    if strategy not in SWEEP_STRATEGIES or strategy == "product":
+        raise ValueError(f"sampled strategy must be one of {SWEEP_STRATEGIES[1:]}")
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"distribution must be one of {DISTRIBUTIONS}")
+    rng = np.random.default_rng(seed)
+    dtype = np.result_type(float, *[np.asarray(limit) for limit in limits])
+
+    if strategy == "corners":
+        codes = corner_codes(type, budget, rng)
+        values = np.array(
+            [[limits[dim][index] for dim, index in enumerate(row)] for row in codes],
+            dtype=dtype,
+        ).reshape(len(codes), len(limits))
+        return codes, values
+
+    if budget is None:
+        raise ValueError(f"strategy '{strategy}' needs a sample budget")
+    u = unit_samples(strategy, budget, len(limits), rng)
+    values = np.empty((budget, len(limits)), dtype=dtype)
+    codes = np.full((budget, len(limits)), SAMPLED, dtype=int)
+    for dim, limit in enumerate(limits):
+        values[:, dim] = limit_values(limit, u[:, dim], distribution)
+        if len(limit) == 1:  # constant, keep it labelled typ
+            codes[:, dim] = 0
+    return codes, values
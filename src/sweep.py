@@ -0,0 +1,310 @@
+"""
+ file: sweep.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: implements the streaming sweep pipeline
+ brief:
+    - iter_sweep is a generator yielding one SweepRecord per combination
+        - combinations come lazily from itertools.product (same order as process_bode),
+          or from the sampled sweep strategy of fs (sampling.py)
+        - only chunk_size combinations are evaluated and held at any time, so peak
+          memory stays flat however large the product gets
+        - evaluation goes through the ExpressionClass executor (executor.py)
+    - SweepRecord holds the combination indices, values, labels and response arrays
+        - w and time are the shared grids, not copies
+        - response is None when the time domain is not requested
+    - sinks consume records one at a time, close() returns their result
+        - PlotSink - draws every record on bode and time domain axes
+        - NpzChunkSink - writes chunk_size records per .npz file
+        - EnvelopeSink - running min/max of magnitude, phase and step response
+        - MetricSink - keeps one value per record from a user supplied function
+        - StoreSink - writes records into a memory mapped ResultStore on disk
+          (results_store.py), one contiguous file per column
+    - run_sweep feeds iter_sweep into any number of sinks
+"""
+
+import collections
+import itertools
+import os
+import numpy as np
+from bode_engine import magnitude_phase
+from executor import bode_task, step_task
+from sampling import sample_combinations
+from results_store import DEFAULT_DTYPE, ResultStore
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+SweepRecord = collections.namedtuple(
+    "SweepRecord",
+    [
+        "index",  # position in the combination order
+        "combination",  # index into each limit, e.g. (0, 2)
+        "values",  # substituted pole/zero values
+        "label",  # legend label, e.g. ['p1', 'min', 'z1', 'max']
+        "annotate_label",  # e.g. ['p1', 0.001, 'z1', 3]
+        "w",  # shared frequency grid (rad/s)
+        "magnitude",  # dB
+        "phase",  # degrees
+        "time",  # shared time grid (s), None without time domain
+        "response",  # unit-step response, None without time domain
+    ],
+)
+
+
+def iter_sweep(fs, w=None, time=None, chunk_size=256, time_domain=True):
+    """yield a SweepRecord per combination of fs (an ExpressionClass)
+    w and time default to the grids plot_bode / process_time_domain use, sized
+    from the pole/zero analysis of the min/max corners
+    """
+    fs.compile()
+    if fs.bode_engine.rational is not None and (w is None or time is None):
+        # size default grids from the corners instead of the whole sweep
+        _, corners = sample_combinations(fs.limits, fs.type, "corners", 1024, seed=0)
+        fs.analyze(corners)
+    w = fs.frequency_grid() if w is None else np.asarray(w, dtype=float)
+    if time_domain:
+        time = fs.time_grid() if time is None else np.asarray(time, dtype=float)
+        if fs.bode_engine.rational is None:
+            raise ValueError("streaming time domain needs a ratio of polynomials in s")
+    else:
+        time = None
+
+    combinations = fs.iter_combinations()  # lazy for the product strategy
+    index = 0
+    while True:
+        chunk = list(itertools.islice(combinations, chunk_size))
+        if not chunk:
+            return
+        labelled = [
+            fs.combination_labels(combination, values) for combination, values in chunk
+        ]
+        values = np.array([values for values, _, _ in labelled])
+
+        h, failures = fs.executor.map(bode_task, fs.spec, fs.keyed(values), w)
+        magnitude, phase = magnitude_phase(h)
+        responses = [None] * len(chunk)
+        if time is not None:
+            responses, step_failures = fs.executor.map(
+                step_task, fs.spec, fs.keyed(values), time
+            )
+            failures += step_failures
+        # failures are reported with their position in the whole sweep
+        fs.failures.extend(
+            failure._replace(index=index + failure.index) for failure in failures
+        )
+
+        for row, (combination, _) in enumerate(chunk):
+            _, label, annotate_label = labelled[row]
+            yield SweepRecord(
+                index,
+                combination,
+                values[row],
+                label,
+                annotate_label,
+                w,
+                magnitude[row],
+                phase[row],
+                time,
+                responses[row],
+            )
+            index += 1
+
+
+def run_sweep(fs, sinks, **options):
+    """stream every record of fs into each sink, returns the sinks' results
+    options are passed on to iter_sweep
+    """
+    for record in iter_sweep(fs, **options):
+        for sink in sinks:
+            sink.consume(record)
+    return [sink.close() for sink in sinks]
+
+
+class PlotSink:
+    """plot records as they arrive, axes default to new figures"""
+
+    def __init__(self, ax_magnitude=None, ax_phase=None, ax_time=None):
+        """create any missing axes"""
+        import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
+
+        if ax_magnitude is None:
+            _, ax_magnitude = plt.subplots(1, 1, figsize=(15, 8))
+        if ax_phase is None:
+            _, ax_phase = plt.subplots(1, 1, figsize=(15, 8))
+        if ax_time is None:
+            _, ax_time = plt.subplots(1, 1, figsize=(15, 8))
+        self.ax_magnitude = ax_magnitude
+        self.ax_phase = ax_phase
+        self.ax_time = ax_time
+
+    def consume(self, record):
+        """add one line per axes for the record"""
+        self.ax_magnitude.semilogx(record.w, record.magnitude, label=str(record.label))
+        self.ax_phase.semilogx(record.w, record.phase, label=str(record.label))
+        if record.response is not None:
+            self.ax_time.plot(record.time, record.response, label=str(record.label))
+
+    def close(self):
+        """return the (magnitude, phase, time) axes"""
+        return self.ax_magnitude, self.ax_phase, self.ax_time
+
+
+class NpzChunkSink:
+    """write records to numbered .npz files, chunk_size records per file"""
+
+    def __init__(self, prefix, chunk_size=1024):
+        """files are named prefix_00000.npz, prefix_00001.npz, ..."""
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.records = []
+        self.files = []
+        directory = os.path.dirname(prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def consume(self, record):
+        """buffer the record, flush once a chunk is full"""
+        self.records.append(record)
+        if len(self.records) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """write the buffered records and drop them from memory"""
+        if not self.records:
+            return
+        records = self.records
+        arrays = {
+            "index": np.array([record.index for record in records]),
+            "combination": np.array([record.combination for record in records]),
+            "values": np.array([record.values for record in records]),
+            "w": records[0].w,
+            "magnitude": np.array([record.magnitude for record in records]),
+            "phase": np.array([record.phase for record in records]),
+        }
+        if records[0].response is not None:
+            arrays["time"] = records[0].time
+            arrays["response"] = np.array([record.response for record in records])
+        file = f"{self.prefix}_{len(self.files):05d}.npz"
+        np.savez(file, **arrays)
+        self.files.append(file)
+        self.records = []
+
+    def close(self):
+        """write what's left, return the list of files written"""
+        self.flush()
+        return self.files
+
+
+class EnvelopeSink:
+    """running min/max envelope of every response across the sweep"""
+
+    def __init__(self):
+        """envelopes are created from the first record"""
+        self.count = 0
+        self.envelopes = {}
+
+    def consume(self, record):
+        """fold the record into the running min/max"""
+        self.count += 1
+        for name in ("magnitude", "phase", "response"):
+            data = getattr(record, name)
+            if data is None:
+                continue
+            data = np.real(data)
+            if name not in self.envelopes:
+                self.envelopes[name] = [data.copy(), data.copy()]
+                continue
+            low, high = self.envelopes[name]
+            np.fmin(low, data, out=low)
+            np.fmax(high, data, out=high)
+
+    def close(self):
+        """return {name: (min, max)} plus the record count"""
+        result = {name: tuple(bounds) for name, bounds in self.envelopes.items()}
+        result["count"] = self.count
+        return result
+
+
+class MetricSink:
+    """reduce each record to one value with metric(record), e.g. peak gain"""
+
+    def __init__(self, metric):
+        """metric is any function of a SweepRecord"""
+        self.metric = metric
+        self.values = []
+
+    def consume(self, record):
+        """keep the metric of the record"""
+        self.values.append(self.metric(record))
+
+    def close(self):
+        """return every metric value, in combination order"""
+        return np.array(self.values)
+
+
+class StoreSink:
+    """write records into a ResultStore created in the directory path"""
+
+    def __init__(self, path, fs, dtype=DEFAULT_DTYPE, chunk_size=1024):
+        """the store is created from the first record (grids), sized for every
+        combination of fs
+        """
+        self.path = path
+        self.fs = fs
+        self.dtype = dtype
+        self.chunk_size = chunk_size
+        self.store = None
+        self.records = []
+        self.rows = 0  # rows written so far
+
+    def create(self, record):
+        """allocate the column files for the whole sweep"""
+        grids = {"w": record.w}
+        columns = {"magnitude": "w", "phase": "w"}
+        if record.response is not None:
+            grids["time"] = record.time
+            columns["response"] = "time"
+        self.store = ResultStore.create(
+            self.path,
+            self.fs.pz,
+            self.fs.type,
+            self.fs.combination_count(),
+            self.fs.limits,
+            grids,
+            columns,
+            function=str(self.fs.s_func),
+            dtype=self.dtype,
+        )
+
+    def consume(self, record):
+        """buffer the record, write once a chunk is full"""
+        if self.store is None:
+            self.create(record)
+        self.records.append(record)
+        if len(self.records) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """write the buffered records to the column files"""
+        if not self.records:
+            return
+        records = self.records
+        columns = {
+            "codes": np.array([record.combination for record in records]),
+            "values": np.array([record.values for record in records]),
+            "magnitude": np.array([record.magnitude for record in records]),
+            "phase": np.array([record.phase for record in records]),
+        }
+        if records[0].response is not None:
+            columns["response"] = np.real([record.response for record in records])
+        self.store.write(self.rows, **columns)
+        self.rows += len(records)
+        self.store.flush(self.rows)
+        self.records = []
+
+    def close(self):
+        """write what's left, return the store opened read only"""
+        self.flush()
+        if self.store is None:
+            return None
+        self.store = None  # drop the writable maps
+        return ResultStore.open(self.path)
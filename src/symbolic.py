@@ -0,0 +1,183 @@
+"""
+ file: symbolic.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: implements SymbolicPool, subprocess isolated symbolic transforms
+ brief:
+    - sympy's inverse laplace transform can take unbounded time, every attempt runs
+      in its own worker process so it can be stopped
+        - timeout (seconds) is enforced per attempt, a worker that runs over is
+          terminated, nothing is left running and nothing ends the caller
+        - works from any thread (no signal.SIGALRM), and many transforms can run
+          at once, at most workers processes at a time
+    - strategies, tried for every transform
+        - "direct" - sp.inverse_laplace_transform of the whole expression
+        - "apart" - partial fractions in s first (sp.apart), then term by term
+        - parallel=False tries them in order until one succeeds, parallel=True
+          starts them all and keeps the first success (the rest are terminated)
+        - a result that still contains an unevaluated InverseLaplaceTransform
+          counts as a failure
+    - every transform comes back as a SymbolicResult
+        - t_func - the time domain expression, None when every strategy failed
+        - strategy - the strategy that produced t_func (None on failure)
+        - error - "strategy: reason" of every failed attempt, "; " separated
+        - seconds - wall time from first attempt to the result
+    - expressions cross the process boundary as srepr text
+    - the numeric fallback (time_domain.py) is applied by ExpressionClass, it
+      needs the substituted values rather than the symbolic expression
+"""
+
+import collections
+import multiprocessing
+import multiprocessing.connection
+import os
+import time
+import sympy as sp
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+SYMBOLIC_STRATEGIES = ("direct", "apart")
+DEFAULT_TIMEOUT = 20  # seconds per attempt
+
+SymbolicResult = collections.namedtuple(
+    "SymbolicResult", ["t_func", "strategy", "error", "seconds"]
+)
+
+
+def inverse_laplace(expr, s_var, t_var, strategy="direct"):
+    """inverse laplace transform of expr with one strategy, raises ValueError
+    if sympy leaves it unevaluated
+    """
+    if strategy == "direct":
+        t_func = sp.inverse_laplace_transform(expr, s_var, t_var)
+    elif strategy == "apart":
+        terms = sp.Add.make_args(sp.apart(sp.together(expr), s_var))
+        t_func = sp.Add(
+            *[sp.inverse_laplace_transform(term, s_var, t_var) for term in terms]
+        )
+    else:
+        raise ValueError(f"strategy must be one of {SYMBOLIC_STRATEGIES}")
+    if t_func.has(sp.InverseLaplaceTransform):
+        raise ValueError("sympy left the transform unevaluated")
+    return t_func
+
+
+def _worker(connection, strategy, expr, s_var, t_var):
+    """worker process body, sends (True, srepr of t_func) or (False, reason)"""
+    try:
+        t_func = inverse_laplace(
+            sp.sympify(expr), sp.sympify(s_var), sp.sympify(t_var), strategy
+        )
+        connection.send((True, sp.srepr(t_func)))
+    except Exception as error:  # pylint: disable=broad-except
+        connection.send((False, f"{type(error).__name__}: {error}"))
+    finally:
+        connection.close()
+
+
+class SymbolicPool:
+    """runs inverse laplace transforms in worker processes with real timeouts"""
+
+    def __init__(
+        self,
+        workers=None,
+        timeout=DEFAULT_TIMEOUT,
+        strategies=SYMBOLIC_STRATEGIES,
+        parallel=False,
+    ):
+        """workers defaults to os.cpu_count(), timeout is per attempt"""
+        for strategy in strategies:
+            if strategy not in SYMBOLIC_STRATEGIES:
+                raise ValueError(f"strategy must be one of {SYMBOLIC_STRATEGIES}")
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.strategies = tuple(strategies)
+        self.parallel = parallel
+        self.context = multiprocessing.get_context()
+
+    def transform(self, expr, s_var, t_var):
+        """SymbolicResult of one inverse laplace transform"""
+        return self.transform_many([(expr, s_var, t_var)])[0]
+
+    def transform_many(self, jobs):
+        """SymbolicResult of every (expr, s_var, t_var) job, in job order"""
+        jobs = [tuple(sp.srepr(part) for part in job) for job in jobs]
+        results = [None] * len(jobs)
+        errors = [[] for _ in jobs]
+        started = [None] * len(jobs)
+        tried = [0] * len(jobs)  # strategies queued so far, per job
+        pending = collections.deque()
+        for job in range(len(jobs)):
+            for strategy in self.strategies if self.parallel else self.strategies[:1]:
+                pending.append((job, strategy))
+                tried[job] += 1
+        running = {}  # connection -> (process, job, strategy, deadline)
+
+        def finish(job, strategy, ok, payload):
+            """record one attempt, queue the next strategy or the result"""
+            if results[job] is not None:  # already solved by a parallel attempt
+                return
+            seconds = time.perf_counter() - started[job]
+            if ok:
+                results[job] = SymbolicResult(sp.sympify(payload), strategy, None, seconds)
+                for connection, (process, other, _, _) in list(running.items()):
+                    if other == job:  # parallel siblings are no longer needed
+                        self._stop(process, connection)
+                        del running[connection]
+                return
+            errors[job].append(f"{strategy}: {payload}")
+            if tried[job] < len(self.strategies) and not self.parallel:
+                pending.appendleft((job, self.strategies[tried[job]]))
+                tried[job] += 1
+            elif len(errors[job]) == len(self.strategies):
+                results[job] = SymbolicResult(None, None, "; ".join(errors[job]), seconds)
+
+        while pending or running:
+            while pending and len(running) < self.workers:
+                job, strategy = pending.popleft()
+                if results[job] is not None:
+                    continue
+                receiver, sender = self.context.Pipe(duplex=False)
+                process = self.context.Process(
+                    target=_worker, args=(sender, strategy) + jobs[job], daemon=True
+                )
+                process.start()
+                sender.close()  # only the worker writes
+                if started[job] is None:
+                    started[job] = time.perf_counter()
+                deadline = None if self.timeout is None else time.monotonic() + self.timeout
+                running[receiver] = (process, job, strategy, deadline)
+
+            if not running:  # everything left pending was already solved
+                continue
+            deadlines = [entry[3] for entry in running.values() if entry[3] is not None]
+            wait = None
+            if deadlines:
+                wait = max(0.0, min(deadlines) - time.monotonic())
+            ready = multiprocessing.connection.wait(list(running), timeout=wait)
+
+            for connection in ready:
+                if connection not in running:  # stopped while handling another
+                    continue
+                process, job, strategy, _ = running.pop(connection)
+                try:
+                    ok, payload = connection.recv()
+                except EOFError:  # worker died without answering
+                    ok, payload = False, f"worker exited with code {process.exitcode}"
+                self._stop(process, connection)
+                finish(job, strategy, ok, payload)
+
+            now = time.monotonic()
+            for connection, (process, job, strategy, deadline) in list(running.items()):
+                if connection in running and deadline is not None and now >= deadline:
+                    del running[connection]
+                    self._stop(process, connection)
+                    finish(job, strategy, False, f"timed out after {self.timeout} s")
+        return results
+
+    @staticmethod
+    def _stop(process, connection):
+        """terminate (if still running) and reap a worker"""
+        if process.is_alive():
+            process.terminate()
+        process.join()
+        connection.close()
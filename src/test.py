@@ -36,7 +36,7 @@ def test_func():
 
     # band-pass filter with wc (p1) = 1k rad/s, Q(p2) = 10, Gain(z1) = (1,1000)
     # sympy cannot process inverse laplace of unit-step driven function
-    # to look at bode plots, uncomment lines 70,71 of process.py
+    # the default numeric time domain mode handles it (see time_domain.py)
     """
     p1 = Symbol("p1")
     p2 = Symbol("p2")
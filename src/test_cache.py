@@ -0,0 +1,40 @@
+"""
+ file: test_cache.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: tests for DiskCache in cache.py
+"""
+
+import os
+import sympy as sp
+from cache import DiskCache
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+
+def test_put_get_invalidate(tmp_path):
+    """entries round trip, keys depend on the kind and symbols"""
+    cache = DiskCache(str(tmp_path))
+    s, p1 = sp.symbols("s p1")
+    key = cache.key("rational", 1 / (p1 * s + 1), s, p1)
+    assert key != cache.key("inverse_laplace", 1 / (p1 * s + 1), s, p1)
+    assert cache.get(key) is None
+    cache.put(key, {"value": [1, 2]})
+    assert cache.get(key) == {"value": [1, 2]}
+    cache.invalidate(key)
+    assert cache.get(key) is None
+
+
+def test_eviction_keeps_recently_used(tmp_path):
+    """entries are evicted least recently used first once max_bytes is exceeded"""
+    cache = DiskCache(str(tmp_path), max_bytes=10**6)
+    for index in range(5):
+        cache.put(f"entry{index}", {"data": "x" * 1000})
+        # distinct modification times regardless of filesystem resolution
+        os.utime(os.path.join(str(tmp_path), f"entry{index}.json"), (index, index))
+    assert cache.get("entry0") is not None  # now the most recently used
+    cache.max_bytes = 3 * 1020
+    cache.evict()
+    kept = sorted(name for name in os.listdir(str(tmp_path)) if name.endswith(".json"))
+    assert kept == ["entry0.json", "entry3.json", "entry4.json"]
+    cache.invalidate()
+    assert not os.listdir(str(tmp_path))
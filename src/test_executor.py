@@ -0,0 +1,67 @@
+"""
+ file: test_executor.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: tests for SweepExecutor in executor.py
+"""
+
+import multiprocessing
+import os
+import time
+import numpy as np
+import sympy as sp
+from executor import SweepExecutor, bode_task
+from instrumentation import Stats
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+s, a = sp.symbols("s a")
+W = np.logspace(0, 1, 5)
+
+
+def test_kinds_agree():
+    """serial, thread and process pools merge the same rows in order"""
+    spec = (a / (s + a), s, ["a"], None)
+    values = np.arange(1, 8, dtype=float)[:, np.newaxis]
+    expected = values / (1j * W + values)
+    for kind in ("serial", "thread", "process"):
+        with SweepExecutor(kind, workers=2, chunk_size=3) as executor:
+            h, failures = executor.map(bode_task, spec, values, W)
+        assert not failures
+        assert np.allclose(h, expected)
+
+
+def test_worker_counts_are_kept():
+    """lambdify counts made in worker processes reach the parent's Stats"""
+    spec = (a / (s**3 + a * s + 7), s, ["a"], None)  # not compiled by the parent
+    stats = Stats()
+    with stats.stage("map"):
+        with SweepExecutor("process", workers=1) as executor:
+            executor.map(bode_task, spec, np.ones((4, 1)), W)
+    assert stats.counters["lambdify"] == 2
+
+
+def pid_task(spec, values, grid):
+    """worker pid for every combination, combinations > 1 hang (spec unused)"""
+    if np.any(values > 1):
+        time.sleep(30)
+    return np.full((len(values), len(grid)), float(os.getpid()))
+
+
+def test_pool_reused_until_timeout():
+    """one pool serves every map, a timeout kills its workers and the next map
+    starts a new one
+    """
+    executor = SweepExecutor("process", workers=2, chunk_size=1, timeout=1)
+    values = np.ones((4, 1))
+    first, _ = executor.map(pid_task, None, values, W)
+    second, _ = executor.map(pid_task, None, values, W)
+    assert set(np.unique(second)) <= set(np.unique(first))
+
+    rows, failures = executor.map(pid_task, None, np.array([[1.0], [2.0]]), W)
+    assert [failure.kind for failure in failures] == ["timeout"]
+    assert np.all(np.isnan(rows[1])) and not multiprocessing.active_children()
+
+    third, _ = executor.map(pid_task, None, values, W)
+    assert not set(np.unique(third)) & set(np.unique(first))
+    executor.close()
+    assert not multiprocessing.active_children()
@@ -0,0 +1,83 @@
+"""
+ file: test_incremental.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: tests for ResultMemo (incremental.py) and ExpressionClass.set_limits
+"""
+
+import numpy as np
+import sympy as sp
+from incremental import ResultMemo
+from process import build_fs
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+s = sp.Symbol("s")
+S_FUNC = sp.sympify("z1 / (p1 * s + 1)")
+
+
+def limits():
+    """3 x 3 combinations"""
+    return {"p1": (1e-3, 1e-2, 1e-1), "z1": (1, 2, 3)}
+
+
+def counted(fs, names=("memo_hits", "memo_misses")):
+    """current value of some fs.stats counters"""
+    return [fs.stats.counters[name] for name in names]
+
+
+def test_memo_computes_missing_rows_once():
+    """repeated rows are computed once, failures are not kept"""
+    memo = ResultMemo()
+    calls = []
+
+    def compute(values):
+        calls.append(len(values))
+        return values * np.ones((1, 3)), []
+
+    values = np.array([[1.0], [2.0], [1.0]])
+    rows, failures = memo.evaluate("bode", np.arange(3), values, compute)
+    assert calls == [2] and not failures
+    assert np.array_equal(rows, values * np.ones((1, 3)))
+    memo.evaluate("bode", np.arange(3), np.array([[2.0], [3.0]]), compute)
+    assert calls == [2, 1]
+    memo.evaluate("bode", np.arange(4), np.array([[2.0]]), compute)  # new grid
+    assert calls == [2, 1, 1]
+
+
+def test_set_limits_recomputes_only_edited_rows():
+    """editing one limit of a pole reuses the 6 unchanged combinations on the
+    kept grids and matches a run without a memo
+    """
+    fs = build_fs(S_FUNC, s, limits(), use_cache=False)
+    fs.process_bode()
+    w = fs.frequency_grid()
+    fs.evaluate_bode(w)
+    fs.process_time_domain()
+    time = fs.time
+    assert counted(fs) == [0, 18]
+
+    fs.set_limits(p1=(1e-3, 1e-2, 1.0))  # moves the default grids
+    _, magnitude, phase = fs.evaluate_bode(fs.frequency_grid())
+    fs.process_time_domain()
+    assert counted(fs) == [12, 24]
+    assert np.array_equal(fs.w, w) and np.array_equal(fs.time, time)
+
+    edited = limits()
+    edited["p1"] = (1e-3, 1e-2, 1.0)
+    fresh = build_fs(S_FUNC, s, edited, use_cache=False, memo=None)
+    fresh.process_bode()
+    _, fresh_magnitude, fresh_phase = fresh.evaluate_bode(w)
+    fresh.process_time_domain(time=time)
+    assert np.allclose(magnitude, fresh_magnitude) and np.allclose(phase, fresh_phase)
+    assert np.allclose(fs.responses_all_t, fresh.responses_all_t)
+    assert counted(fresh) == [0, 0]
+
+
+def test_set_limits_regrid():
+    """regrid=True sizes new grids from the edited limits"""
+    fs = build_fs(S_FUNC, s, limits(), use_cache=False)
+    fs.process_bode()
+    w = fs.frequency_grid()
+    fs.evaluate_bode(w)
+    fs.set_limits(regrid=True, p1=(1e-3, 1e-2, 1.0))
+    assert not np.array_equal(fs.frequency_grid(), w)
@@ -0,0 +1,111 @@
+"""
+ file: test_metrics.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: tests for the step and frequency metrics in metrics.py
+ brief:
+    - step metrics of analytic first and second order responses
+    - bandwidth and gain/phase margins of systems with known crossings
+"""
+
+import numpy as np
+from metrics import step_metrics, frequency_metrics
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+W = np.logspace(-2, 2, 4001)
+
+
+def response_of(num, den):
+    """H(jw) of polynomial coefficients (highest power first) over W"""
+    s = 1j * W
+    return np.polyval(num, s) / np.polyval(den, s)
+
+
+def test_first_order_step_metrics():
+    """rise time tau ln 9, 2% settling time tau ln 50, no overshoot"""
+    tau = 0.5
+    time = np.linspace(0, 10, 20001)
+    metrics = step_metrics(time, 1 - np.exp(-time / tau))[0]
+    assert metrics["settled"]
+    assert np.isclose(metrics["steady_state"], 1, atol=1e-6)
+    assert np.isclose(metrics["rise_time"], tau * np.log(9), rtol=1e-3)
+    assert np.isclose(metrics["settling_time"], tau * np.log(50), rtol=1e-3)
+    assert metrics["overshoot"] < 1e-3
+
+
+def test_second_order_overshoot():
+    """percent overshoot exp(-zeta pi / sqrt(1 - zeta^2)) at the damped peak"""
+    zeta, wn = 0.3, 2.0
+    time = np.linspace(0, 30, 30001)
+    wd = wn * np.sqrt(1 - zeta**2)
+    response = 1 - np.exp(-zeta * wn * time) * (
+        np.cos(wd * time) + zeta / np.sqrt(1 - zeta**2) * np.sin(wd * time)
+    )
+    metrics = step_metrics(time, np.stack([response, 2 * response]))
+    expected = 100 * np.exp(-zeta * np.pi / np.sqrt(1 - zeta**2))
+    assert np.allclose(metrics["overshoot"], expected, rtol=1e-3)
+    assert np.allclose(metrics["peak_time"], np.pi / wd, rtol=1e-3)
+    assert np.allclose(metrics["steady_state"], [1, 2], rtol=1e-4)
+
+
+def test_unsettled_response():
+    """a ramp never settles"""
+    time = np.linspace(0, 10, 101)
+    metrics = step_metrics(time, time)[0]
+    assert not metrics["settled"]
+    assert np.isnan(metrics["settling_time"])
+
+
+def test_first_order_bandwidth():
+    """1/(s + 1) is 3 dB down at sqrt(10^0.3 - 1) (~1 rad/s) and never crosses
+    -180 degrees, the band starts at 0
+    """
+    metrics = frequency_metrics(W, response_of([1], [1, 1]))[0]
+    assert np.isclose(metrics["dc_gain"], 0, atol=1e-3)
+    assert np.isclose(metrics["bandwidth"], np.sqrt(10**0.3 - 1), rtol=1e-3)
+    assert np.isnan(metrics["phase_crossover"])
+    assert np.isnan(metrics["gain_margin"])
+    assert metrics["band_low"] == 0
+
+
+def test_bandpass_bandwidth():
+    """w0 s / Q / (s^2 + w0 s / Q + w0^2) is 3 dB down at w0/Q apart edges, the
+    lowest frequency is far below the passband
+    """
+    w0 = 1.0
+    for q in (2, 10):
+        metrics = frequency_metrics(W, response_of([w0 / q, 0], [1, w0 / q, w0**2]))[0]
+        assert metrics["peak_frequency"] == W[np.argmin(np.abs(W - w0))]
+        # exactly 3 dB (not 10 log10(2)) down, a hair wider than w0/Q
+        half = np.sqrt(10**0.3 - 1) * w0 / q
+        edges = np.roots([1, -half, -(w0**2)]).real
+        assert np.isclose(metrics["band_high"], edges.max(), rtol=1e-3)
+        assert np.isclose(metrics["band_low"], -edges.min(), rtol=1e-3)
+        assert np.isclose(metrics["bandwidth"], half, rtol=1e-2)
+
+
+def test_known_margins():
+    """1/(s + 1)^3 and 10/(s (s + 1) (s + 2)) cross -180 degrees at sqrt(3)
+    and sqrt(2), with gain margins 20 log10(8) and 20 log10(0.6)
+    """
+    h = np.stack(
+        [
+            response_of([1], [1, 3, 3, 1]),
+            response_of([10], [1, 3, 2, 0]),
+        ]
+    )
+    metrics = frequency_metrics(W, h)
+    assert np.allclose(metrics["phase_crossover"], [np.sqrt(3), np.sqrt(2)], rtol=1e-3)
+    assert np.allclose(metrics["gain_margin"], 20 * np.log10([8, 0.6]), atol=1e-2)
+    # no gain crossover for the first, the second is unstable (negative margin)
+    assert np.isnan(metrics["gain_crossover"][0])
+    assert metrics["phase_margin"][1] < 0
+
+
+def test_phase_margin():
+    """2/(s (s + 1)) crosses 0 dB at sqrt((sqrt(17) - 1) / 2)"""
+    metrics = frequency_metrics(W, response_of([2], [1, 1, 0]))[0]
+    crossover = np.sqrt((np.sqrt(17) - 1) / 2)
+    assert np.isclose(metrics["gain_crossover"], crossover, rtol=1e-3)
+    margin = 180 - 90 - np.degrees(np.arctan(crossover))
+    assert np.isclose(metrics["phase_margin"], margin, atol=0.1)
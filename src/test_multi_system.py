@@ -0,0 +1,40 @@
+"""
+ file: test_multi_system.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: tests for process_many in multi_system.py
+"""
+
+import numpy as np
+import sympy as sp
+from multi_system import process_many
+from process import build_fs
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+s, x = sp.symbols("s x")
+p1, z1, k, tau = sp.symbols("p1 z1 k tau")
+SPECS = {
+    "lp": (z1 / (p1 * s + 1), s, {"p1": (1e-3, 1e-2, 1e-1), "z1": (1, 2, 3)}),
+    "renamed": (k / (tau * x + 1), x, {"k": (1, 2, 3), "tau": (1e-3, 1e-2, 2e-1)}),
+}
+
+
+def test_groups_keep_the_given_order(tmp_path, monkeypatch):
+    """renamed copies share a group, labels and columns keep the limits order,
+    nothing is written to the disk cache with use_cache=False
+    """
+    monkeypatch.setenv("POLE_ZERO_CACHE_DIR", str(tmp_path / "cache"))
+    result = process_many(SPECS, use_cache=False)
+    assert list(result.groups.values()) == [["lp", "renamed"]]
+    for name, (s_func, s_var, limits) in SPECS.items():
+        store = result.stores[name]
+        assert store.pz == list(limits)
+        assert store.labels(0)[0][::2] == list(limits)
+        fs = build_fs(s_func, s_var, limits, use_cache=False, memo=None)
+        fs.process_bode()
+        _, magnitude, _ = fs.evaluate_bode(result.w)
+        fs.process_time_domain(time=result.time)
+        assert np.array_equal(store["values"], fs.values_all_s)
+        assert np.allclose(store["magnitude"], magnitude, atol=1e-3)
+        assert np.allclose(store["response"], fs.responses_all_t, atol=1e-4)
+    assert not (tmp_path / "cache").exists()
@@ -0,0 +1,49 @@
+"""
+ file: test_rational.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: tests for RationalFunction and batched_roots in rational.py
+"""
+
+import numpy as np
+import sympy as sp
+from rational import RationalFunction, batched_roots, horner, is_rational
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+
+def sorted_roots(roots):
+    """roots in a comparable order"""
+    return np.sort_complex(np.asarray(roots, dtype=complex))
+
+
+def test_batched_roots_match_np_roots():
+    """every row agrees with np.roots"""
+    rng = np.random.default_rng(0)
+    coeffs = rng.normal(size=(20, 5)) + 1j * rng.normal(size=(20, 5))
+    roots = batched_roots(coeffs)
+    assert roots.shape == (20, 4)
+    for row, row_roots in zip(coeffs, roots):
+        assert np.allclose(sorted_roots(row_roots), sorted_roots(np.roots(row)))
+
+
+def test_batched_roots_lower_degree_rows():
+    """a zero leading coefficient leaves nan padding"""
+    roots = batched_roots([[1, -3, 2], [0, 1, 4], [0, 0, 5]])
+    assert np.allclose(sorted_roots(roots[0]), [1, 2])
+    assert np.isclose(roots[1, 0], -4) and np.isnan(roots[1, 1])
+    assert np.all(np.isnan(roots[2]))
+
+
+def test_rational_function_response():
+    """coefficients and response of z1 / (p1 s + 1) for a batch of values"""
+    s, z1, p1 = sp.symbols("s z1 p1")
+    assert is_rational(z1 / (p1 * s + 1), s)
+    assert not is_rational(sp.exp(-s * p1) / (s + 1), s)
+    rational = RationalFunction(z1 / (p1 * s + 1), s, ["z1", "p1"])
+    values = np.array([[1.0, 2.0], [3.0, 0.5]])
+    num, den = rational.coefficients(values)
+    assert np.allclose(num, [[1], [3]]) and np.allclose(den, [[2, 1], [0.5, 1]])
+    w = np.array([0.1, 1.0, 10.0])
+    expected = values[:, :1] / (values[:, 1:] * 1j * w + 1)
+    assert np.allclose(rational.response(values, w), expected)
+    assert np.allclose(horner(den, 1j * w), values[:, 1:] * 1j * w + 1)
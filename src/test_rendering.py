@@ -0,0 +1,44 @@
+"""
+ file: test_rendering.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: tests for the plot rendering helpers in rendering.py
+ brief:
+    - every render mode draws with the default arguments
+    - lines mode adds legend entries only for the given labels
+"""
+
+import matplotlib
+import numpy as np
+from rendering import RENDER_MODES, draw
+
+matplotlib.use("Agg")
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+X = np.logspace(0, 3, 500)
+Y = np.sin(np.arange(4)[:, np.newaxis] + np.log(X)[np.newaxis, :])
+
+
+def test_draw_every_mode_without_labels():
+    """every mode draws the whole sweep with the default arguments"""
+    import matplotlib.pyplot as plt
+
+    for mode in RENDER_MODES:
+        figure, ax = plt.subplots()
+        draw(ax, X, Y, mode, log_x=True)
+        if mode == "lines":
+            assert len(ax.lines) == len(Y)
+            assert not ax.get_legend_handles_labels()[1]
+        else:
+            assert ax.get_legend_handles_labels()[1]  # one summary entry per artist
+        plt.close(figure)
+
+
+def test_draw_lines_with_labels():
+    """one legend entry per labelled row"""
+    import matplotlib.pyplot as plt
+
+    figure, ax = plt.subplots()
+    draw(ax, X, Y, "lines", labels=["a", "b", "c", "d"])
+    assert ax.get_legend_handles_labels()[1] == ["a", "b", "c", "d"]
+    plt.close(figure)
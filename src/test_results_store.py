@@ -0,0 +1,78 @@
+"""
+ file: test_results_store.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: tests for ResultStore (results_store.py) and StoreSink (sweep.py)
+ brief:
+    - to_store/save/open round trip, memory mapped columns, row slicing,
+      select and labels
+    - a StoreSink written store matches the in-memory one
+"""
+
+import numpy as np
+import sympy as sp
+from process import build_fs
+from results_store import ResultStore
+from sweep import StoreSink, run_sweep
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+s = sp.Symbol("s")
+S_FUNC = sp.sympify("z1 / (p1 * s + 1)")
+LIMITS = {"z1": (1, 2, 3), "p1": (0.5, 2)}
+TIME = np.linspace(0, 40, 101)
+W = np.logspace(-2, 2, 41)
+
+
+def processed_fs():
+    """z1 / (p1 s + 1) over 3 x 2 combinations, bode and step responses"""
+    fs = build_fs(S_FUNC, s, LIMITS, use_cache=False)
+    fs.process_bode()
+    fs.process_time_domain(mode="numeric", time=TIME)
+    return fs
+
+
+def test_save_open_round_trip(tmp_path):
+    """saved columns reopen memory mapped and equal"""
+    store = processed_fs().to_store(W, path=str(tmp_path / "store"))
+    opened = ResultStore.open(str(tmp_path / "store"))
+    assert len(opened) == len(store) == 6
+    assert opened.pz == ["z1", "p1"] and opened.type == [3, 2]
+    assert opened.limits == [(1, 2, 3), (0.5, 2)]
+    assert isinstance(opened["magnitude"], np.memmap)
+    assert opened["magnitude"].dtype == np.float32
+    for name in ("codes", "values", "magnitude", "phase", "response"):
+        assert np.array_equal(opened[name], store[name])
+    assert np.array_equal(opened["step_metrics"], store["step_metrics"])
+    assert np.array_equal(opened["w"], W) and np.array_equal(opened["time"], TIME)
+    assert opened.column_grids == {"magnitude": "w", "phase": "w", "response": "time"}
+
+    loaded = ResultStore.open(str(tmp_path / "store"), mmap=False)
+    assert not isinstance(loaded["response"], np.memmap)
+
+
+def test_slice_select_labels(tmp_path):
+    """rows, masks and labels of a reopened store"""
+    processed_fs().to_store(W, path=str(tmp_path / "store"))
+    store = ResultStore.open(str(tmp_path / "store"))
+    mask = store.select(z1="typ", p1="max")
+    assert mask.sum() == 1
+    row = store[mask]
+    assert row.labels() == [["z1", "typ", "p1", "max"]]
+    assert np.allclose(row["values"], [[2, 2]])
+    # steady state of z1 / (p1 s + 1) is z1
+    assert np.isclose(row["step_metrics"]["steady_state"][0], 2, rtol=1e-3)
+    assert len(store[1:4]) == 3 and len(store[-1]) == 1
+    assert store.labels(0) == [["z1", "min", "p1", "min"]]
+    assert store.select(z1=3).sum() == 2
+
+
+def test_store_sink_matches_store(tmp_path):
+    """a streamed store equals the in-memory one"""
+    fs = processed_fs()
+    store = fs.to_store(W)
+    sink = StoreSink(str(tmp_path / "sink"), fs, chunk_size=4)
+    run_sweep(fs, [sink], w=W, time=TIME)
+    opened = ResultStore.open(str(tmp_path / "sink"))
+    assert len(opened) == len(store)
+    for name in ("codes", "values", "magnitude", "phase", "response"):
+        assert np.allclose(opened[name], store[name])
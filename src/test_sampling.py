@@ -0,0 +1,67 @@
+"""
+ file: test_sampling.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: tests for the sweep strategies in sampling.py
+"""
+
+import numpy as np
+from sampling import SAMPLED, corner_codes, sample_combinations, unit_samples
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+LIMITS = [(1.0, 2.0, 3.0), (10.0, 20.0), (5.0,)]
+TYPE = [3, 2, 1]
+
+
+def test_latin_hypercube_strata():
+    """every column has exactly one sample in each 1/budget stratum"""
+    budget = 50
+    u = unit_samples("latin_hypercube", budget, 4, np.random.default_rng(1))
+    assert np.all((u >= 0) & (u < 1))
+    for column in u.T:
+        assert np.array_equal(np.sort(np.floor(column * budget)), np.arange(budget))
+
+
+def test_corner_codes():
+    """min/max of every limit, typ only for single value limits"""
+    codes = corner_codes(TYPE)
+    assert codes.tolist() == [[0, 0, 0], [0, 1, 0], [2, 0, 0], [2, 1, 0]]
+    thinned = corner_codes([3] * 20, budget=10, rng=np.random.default_rng(0))
+    assert thinned.shape == (10, 20)
+    assert len({tuple(row) for row in thinned.tolist()}) == 10
+    assert set(np.unique(thinned)) <= {0, 2}
+
+
+def test_corners_values():
+    """corner values are the limits the codes point at"""
+    codes, values = sample_combinations(LIMITS, TYPE, "corners")
+    assert values.tolist() == [
+        [1.0, 10.0, 5.0],
+        [1.0, 20.0, 5.0],
+        [3.0, 10.0, 5.0],
+        [3.0, 20.0, 5.0],
+    ]
+    assert codes.shape == values.shape
+
+
+def test_sampled_values_in_limits_and_seeded():
+    """draws stay inside min..max, constants stay typ, seeds reproduce"""
+    for strategy in ("monte_carlo", "latin_hypercube"):
+        codes, values = sample_combinations(LIMITS, TYPE, strategy, 200, seed=3)
+        assert values.shape == (200, 3)
+        assert np.all((values[:, 0] >= 1) & (values[:, 0] <= 3))
+        assert np.all((values[:, 1] >= 10) & (values[:, 1] <= 20))
+        assert np.all(values[:, 2] == 5)
+        assert np.all(codes[:, :2] == SAMPLED) and np.all(codes[:, 2] == 0)
+        _, again = sample_combinations(LIMITS, TYPE, strategy, 200, seed=3)
+        assert np.array_equal(values, again)
+
+
+def test_sampling_errors():
+    """product isn't a sampled strategy, random strategies need a budget"""
+    for strategy, budget in (("product", 10), ("monte_carlo", None)):
+        try:
+            sample_combinations(LIMITS, TYPE, strategy, budget)
+        except ValueError:
+            continue
+        assert False, f"{strategy} accepted"
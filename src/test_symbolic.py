@@ -0,0 +1,44 @@
+"""
+ file: test_symbolic.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: tests for SymbolicPool in symbolic.py
+ brief:
+    - a transform sympy doesn't finish in time is terminated and reported, and
+      process_time_domain falls back to the numeric step response
+"""
+
+import multiprocessing
+import numpy as np
+import sympy as sp
+from process import build_fs
+from symbolic import SymbolicPool
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+s, t = sp.symbols("s t")
+p1, p2, p3, p4 = sp.symbols("p1 p2 p3 p4")
+CUBIC = 1 / (p1 * s**3 + p2 * s**2 + p3 * s + p4)  # sympy takes minutes on it
+
+
+def test_transform():
+    """a transform sympy can do comes back with its strategy"""
+    result = SymbolicPool().transform(1 / (p1 * s + 1) / s, s, t)
+    assert result.error is None and result.strategy == "direct"
+    assert result.t_func.subs({p1: 1, t: 1}) == 1 - sp.exp(-1)
+
+
+def test_timeout_terminates_and_falls_back():
+    """every strategy times out, no worker is left, responses are numeric"""
+    fs = build_fs(
+        CUBIC,
+        s,
+        {"p1": (1, 2), "p2": 3, "p3": 3, "p4": 1},
+        use_cache=False,
+        symbolic=SymbolicPool(timeout=0.5),
+    )
+    fs.process_bode()
+    fs.process_time_domain(mode="symbolic")
+    assert fs.t_func is None and fs.symbolic_result.t_func is None
+    assert "timed out" in fs.symbolic_result.error
+    assert not multiprocessing.active_children()
+    assert np.all(np.isfinite(fs.responses_all_t))
@@ -0,0 +1,109 @@
+"""
+ file: test_time_domain.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: tests for the numeric time domain solvers in time_domain.py
+ brief:
+    - expm against matrices with a known exponential (diagonal, rotation)
+    - step_response and euler_step against analytic unit-step responses
+    - run with python -m pytest -q from the src directory
+"""
+
+import numpy as np
+from time_domain import expm, step_response, euler_step
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+TIME = np.linspace(0, 10, 201)
+
+
+def second_order(zeta, wn, t):
+    """unit-step response of wn^2 / (s^2 + 2 zeta wn s + wn^2), zeta < 1"""
+    wd = wn * np.sqrt(1 - zeta**2)
+    phi = np.arccos(zeta)
+    return 1 - np.exp(-zeta * wn * t) * np.sin(wd * t + phi) / np.sqrt(1 - zeta**2)
+
+
+def test_expm_diagonal_and_rotation():
+    """batched expm of a diagonal and a rotation generator"""
+    theta = 2.5
+    a = np.array(
+        [
+            [[-1.0, 0.0], [0.0, 3.0]],
+            [[0.0, -theta], [theta, 0.0]],
+        ]
+    )
+    result = expm(a)
+    assert np.allclose(result[0], np.diag(np.exp([-1.0, 3.0])), rtol=1e-12)
+    rotation = [[np.cos(theta), -np.sin(theta)], [np.sin(theta), np.cos(theta)]]
+    assert np.allclose(result[1], rotation, atol=1e-12)
+
+
+def test_expm_large_norm():
+    """scaling and squaring keeps large norms accurate"""
+    result = expm(np.array([[[-40.0, 0.0], [0.0, 5.0]]]))
+    assert np.allclose(result[0], np.diag(np.exp([-40.0, 5.0])), rtol=1e-10)
+
+
+def test_step_response_first_and_second_order():
+    """1/(tau s + 1) and an underdamped second order system in one batch"""
+    tau, zeta, wn = 2.0, 0.3, 1.5
+    # first order padded to second, (s + 1/tau) / (tau s^2 + 2 s + 1/tau)
+    num = [[1, 1 / tau], [0, wn**2]]
+    den = [[tau, 2, 1 / tau], [1, 2 * zeta * wn, wn**2]]
+    response = step_response(num, den, TIME)
+    assert response.shape == (2, TIME.size)
+    assert not np.iscomplexobj(response)
+    assert np.allclose(response[0], 1 - np.exp(-TIME / tau), atol=1e-10)
+    assert np.allclose(response[1], second_order(zeta, wn, TIME), atol=1e-10)
+
+
+def test_step_response_zero_leading_coefficient():
+    """rows whose denominator degree drops come back as nan"""
+    response = step_response([[1], [1]], [[0, 1, 1], [1, 2, 1]], TIME)
+    assert np.all(np.isnan(response[0]))
+    assert np.allclose(response[1], 1 - np.exp(-TIME) * (1 + TIME), atol=1e-10)
+
+
+def test_step_response_feedthrough_and_improper():
+    """equal degrees add a direct term, improper functions are rejected"""
+    # (s + 2) / (s + 1) = 1 + 1 / (s + 1), step response 2 - exp(-t)
+    response = step_response([[1, 2]], [[1, 1]], TIME)
+    assert np.allclose(response[0], 2 - np.exp(-TIME), atol=1e-10)
+    try:
+        step_response([[1, 0, 0]], [[1, 1]], TIME)
+    except ValueError:
+        pass
+    else:
+        assert False, "improper transfer function accepted"
+
+
+def test_euler_step_matches_analytic():
+    """lowpass, lightly damped resonance and the t = 0 initial value"""
+    zeta, wn = 0.05, 3.0
+
+    def transfer(s):
+        return np.stack([1 / (s + 1), wn**2 / (s**2 + 2 * zeta * wn * s + wn**2)])
+
+    response = euler_step(transfer, TIME)
+    assert np.allclose(response[0], 1 - np.exp(-TIME), atol=1e-6)
+    assert np.allclose(response[1], second_order(zeta, wn, TIME), atol=1e-6)
+    assert np.allclose(response[:, 0], 0, atol=1e-12)
+
+
+def test_euler_step_initial_value_and_delay():
+    """(s + 2) / (s + 1) starts at 1, a pure delay is exact away from its edge"""
+    response = euler_step(lambda s: ((s + 2) / (s + 1))[np.newaxis, :], TIME)
+    assert np.allclose(response[0], 2 - np.exp(-TIME), atol=1e-6)
+
+    response = euler_step(lambda s: (np.exp(-s) / (s + 1))[np.newaxis, :], TIME)
+    expected = np.where(TIME > 1, 1 - np.exp(-(TIME - 1)), 0)
+    away = np.abs(TIME - 1) > 0.2
+    assert np.allclose(response[0, away], expected[away], atol=1e-4)
+
+
+def test_euler_step_agrees_with_step_response():
+    """both solvers give the same third order response"""
+    den = np.array([[1, 3, 3, 1]])
+    numeric = step_response([[1]], den, TIME)
+    inverted = euler_step(lambda s: 1 / (s + 1) ** 3 * np.ones((1, 1)), TIME)
+    assert np.allclose(numeric, inverted, atol=1e-6)
@@ -0,0 +1,211 @@
+"""
+ file: time_domain.py
+ author: Drew Seidel (dseidel@pdx.edu)
+ description: implements numeric unit-step response solver
+ brief:
+    - replaces the symbolic inverse laplace for ratios of polynomials in s
+    - step_response takes batched numerator/denominator coefficients (see rational.py)
+      and a uniformly spaced time grid (np.linspace), returns a
+      (combinations x time) array
+        - each combination is realized in controllable canonical state-space form
+        - the unit step is applied by augmenting the state matrix with the input,
+          so one matrix exponential per combination gives the exact discrete step
+        - all combinations are stepped together with batched matrix products
+    - expm is a batched Pade (6, 6) scaling and squaring matrix exponential
+    - euler_step is the numeric fallback for functions that are not ratios of
+      polynomials (delays, roots of s, ...), Euler (Abate-Whitt) numerical
+      inversion of H(s)/s from points on a vertical line in the right half plane,
+      so delays (exp(-s*tau)) stay bounded
+        - the Fourier series along the line is summed term by term, then Euler
+          (binomial) averaged, the number of terms is doubled until successive
+          estimates agree (EULER_TOL) and reach the nyquist frequency of the
+          time grid, so lightly damped resonances (many cycles over the time
+          grid) get the terms they need, up to EULER_MAX_TERMS
+        - both halves of the line are summed, so complex coefficients work
+        - about 1e-8 relative where it converges, discretization error ~exp(-A)
+          is ~1e-8, responses growing faster than exp(A * t / 2) are not
+          recovered
+        - approximate next to discontinuities (e.g. the edge of a pure delay),
+          times that don't converge keep the EULER_MAX_TERMS estimate
+        - t = 0 is the initial value, H(s) at very large s
+"""
+
+import collections
+import math
+import numpy as np
+
+# pylint: disable=locally-disabled, multiple-statements, fixme, invalid-name
+
+PADE_ORDER = 6
+EULER_A = 18.4  # contour abscissa (times 2t), discretization error ~exp(-A)
+EULER_TERMS = 16  # first estimate's terms, doubled until converged
+EULER_MAX_TERMS = 1024
+EULER_AVERAGED = 11  # partial sums in the binomial (Euler) average
+EULER_TOL = 1e-9  # agreement between successive estimates, relative to the row
+EULER_INITIAL_S = 1e15  # "infinite" s for the t = 0 initial value
+PADE_COEFFS = [
+    math.factorial(2 * PADE_ORDER - k)
+    * math.factorial(PADE_ORDER)
+    / (
+        math.factorial(2 * PADE_ORDER)
+        * math.factorial(k)
+        * math.factorial(PADE_ORDER - k)
+    )
+    for k in range(PADE_ORDER + 1)
+]
+
+
+def expm(a):
+    """matrix exponential of a stack of square matrices shaped (batch, n, n)"""
+    a = np.asarray(a, dtype=complex)
+    norms = np.max(np.sum(np.abs(a), axis=2), axis=1)  # infinity norm per matrix
+    with np.errstate(divide="ignore"):
+        squarings = np.maximum(0, np.ceil(np.log2(norms / 0.5))).astype(int)
+    squarings[~np.isfinite(norms)] = 0
+    x = a / (2.0 ** squarings)[:, np.newaxis, np.newaxis]
+
+    identity = np.broadcast_to(np.eye(a.shape[1]), a.shape)
+    numerator = PADE_COEFFS[0] * identity
+    denominator = PADE_COEFFS[0] * identity
+    power = identity
+    for k in range(1, PADE_ORDER + 1):
+        power = power @ x
+        numerator = numerator + PADE_COEFFS[k] * power
+        denominator = denominator + ((-1) ** k) * PADE_COEFFS[k] * power
+    result = np.linalg.solve(denominator, numerator)
+
+    # undo the scaling, each matrix is only squared as many times as it was scaled
+    for squaring in range(int(squarings.max(initial=0))):
+        squared = result @ result
+        mask = (squarings > squaring)[:, np.newaxis, np.newaxis]
+        result = np.where(mask, squared, result)
+    return result
+
+
+def step_response(num, den, time):
+    """unit-step response for every combination of num/den coefficients (rows)
+    num and den are highest power first, time must be uniformly spaced
+    rows with a zero leading denominator coefficient come back as nan
+    """
+    num = np.atleast_2d(np.asarray(num, dtype=complex))
+    den = np.atleast_2d(np.asarray(den, dtype=complex))
+    time = np.asarray(time, dtype=float)
+    batch = den.shape[0]
+    order = den.shape[1] - 1
+
+    # drop numerator leading coefficients that are zero for every combination
+    while num.shape[1] > 1 and num.shape[1] > den.shape[1] and not np.any(num[:, 0]):
+        num = num[:, 1:]
+    if num.shape[1] > den.shape[1]:
+        raise ValueError("improper transfer function, step response contains impulses")
+
+    lead = den[:, 0]
+    valid = lead != 0
+    lead = np.where(valid, lead, 1)
+    a = den / lead[:, np.newaxis]  # monic denominator
+    b = np.zeros((batch, order + 1), dtype=complex)
+    b[:, order + 1 - num.shape[1] :] = num / lead[:, np.newaxis]
+
+    feedthrough = b[:, 0]  # direct term, nonzero only when degrees match
+    if order == 0:
+        response = np.repeat(feedthrough[:, np.newaxis], time.size, axis=1)
+    else:
+        c = b[:, 1:] - feedthrough[:, np.newaxis] * a[:, 1:]  # strictly proper part
+
+        # controllable canonical form augmented with the (constant) step input:
+        # d/dt [x; u] = [[A, B], [0, 0]] [x; u]
+        augmented = np.zeros((batch, order + 1, order + 1), dtype=complex)
+        augmented[:, 0, :order] = -a[:, 1:]
+        augmented[:, 1:order, : order - 1] += np.eye(order - 1)
+        augmented[:, 0, order] = 1
+
+        dt = time[1] - time[0] if time.size > 1 else 0.0
+        step = expm(augmented * dt)
+        phi = step[:, :order, :order]
+        gamma = step[:, :order, order]
+
+        state = np.zeros((batch, order), dtype=complex)
+        if time.size and time[0] != 0:  # grid doesn't start at t = 0
+            state = expm(augmented * time[0])[:, :order, order]
+        response = np.empty((batch, time.size), dtype=complex)
+        for index in range(time.size):
+            response[:, index] = np.sum(c * state, axis=1)
+            state = np.einsum("bij,bj->bi", phi, state) + gamma
+        response += feedthrough[:, np.newaxis]
+
+    response[~valid] = np.nan
+    finite = np.isfinite(response)
+    scale = max(1.0, np.max(np.abs(response[finite]), initial=0))
+    if np.all(np.abs(response.imag[finite]) <= 1e-9 * scale):
+        return response.real
+    return response
+
+
+def euler_step(
+    transfer, time, terms=EULER_TERMS, max_terms=EULER_MAX_TERMS, tol=EULER_TOL
+):
+    """unit-step response of every combination by Euler (Abate-Whitt) inversion
+    transfer(s) returns H(s) as a (combinations x len(s)) array for 1-D complex s
+    terms are doubled (up to max_terms) until two estimates agree within tol,
+    relative to the largest value of the row, time by time, and reach the
+    nyquist frequency of the time grid, a time that never converges keeps the
+    max_terms estimate
+    t = 0 is the initial value H(s) as s -> infinity
+    """
+    time = np.asarray(time, dtype=float)
+    h0 = np.asarray(transfer(np.array([EULER_INITIAL_S], dtype=complex)))
+    response = np.zeros((h0.shape[0], time.size), dtype=complex)
+    response[:, time == 0] = h0  # initial value theorem, 0 before the step
+    active = np.flatnonzero(time > 0)  # times not converged yet
+    t = time[active]
+    # terms reach frequency k * pi / t, every time needs at least the grid's
+    # nyquist frequency (pi / spacing), or resonances the grid shows are missed
+    spacing = np.min(np.diff(np.unique(time))) if np.unique(time).size > 1 else 1.0
+    floor = np.minimum(np.ceil(t / spacing), max_terms) if time.size > 1 else 0 * t
+
+    averaging = np.array(
+        [math.comb(EULER_AVERAGED, j) for j in range(EULER_AVERAGED + 1)]
+    ) / 2.0**EULER_AVERAGED
+    window = collections.deque(maxlen=EULER_AVERAGED + 1)  # last partial sums
+    partial, estimate = 0, None
+    checkpoint, k = terms, 0
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        while active.size:
+            s = (EULER_A + 2j * np.pi * k) / (2 * t)
+            if k == 0:
+                term = transfer(s) / s
+            else:  # both halves of the line, so complex coefficients work
+                both = np.concatenate([s, np.conj(s)])
+                g = transfer(both) / both
+                term = (-1) ** k * (g[:, : t.size] + g[:, t.size :])
+            partial = partial + term
+            window.append(partial)
+            k += 1
+            if k <= checkpoint + EULER_AVERAGED:
+                continue
+
+            # binomial average of the partial sums S(checkpoint)..S(checkpoint + m)
+            value = sum(weight * sums for weight, sums in zip(averaging, window))
+            value = value * (np.exp(EULER_A / 2) / (2 * t))
+            if estimate is None and checkpoint < max_terms:
+                estimate, checkpoint = value, checkpoint * 2
+                continue
+            scale = np.max(np.abs(np.nan_to_num(value)), axis=1, keepdims=True)
+            close = np.abs(value - estimate) <= tol * np.maximum(scale, 1e-300)
+            done = np.all(close | ~np.isfinite(value), axis=0) & (floor <= checkpoint)
+            if checkpoint >= max_terms:
+                done[:] = True
+            response[:, active[done]] = value[:, done]
+            keep = ~done
+            active, t, floor = active[keep], t[keep], floor[keep]
+            partial, estimate = partial[:, keep], value[:, keep]
+            window = collections.deque(
+                (sums[:, keep] for sums in window), maxlen=EULER_AVERAGED + 1
+            )
+            checkpoint *= 2
+
+    finite = np.isfinite(response)
+    scale = max(1.0, np.max(np.abs(response[finite]), initial=0))
+    if np.all(np.abs(response.imag[finite]) <= 1e-6 * scale):
+        return response.real
+    return response